@@ -5,27 +5,36 @@
 import sys
 import os
 import time
+import math
 import argparse
-from collections import deque
-
-def read_input_bnb(filename):
-    with open(filename, 'r') as f:
-        first_line = f.readline().split() #reads a single line from the file, splits the string by space
-        n = int(first_line[0]) #number of elements in U
-        m = int(first_line[1]) #number of subsets
-        subsets = [] #initializes an empty list to store information about each subset
-        for idx in range(m): #subset 1 to m
-            parts = list(map(int, f.readline().split())) # reads each line/subset
-            size = parts[0] #size of each subset
-            elements = parts[1:] #elements of each subset
-            bitmask = 0 #we use bitmasking(a binary number to store a set) to make the best solution finding process more efficient. We use a decimal number to represent a binary number, and that binary number’s bit positions tell us whether each element is in or out of a subset. the process is : use binary to represent a subset, and the conver the binary to a decimal, which is bitmask value
-            for e in elements:
-                bitmask |= 1 << (e - 1) #Shift 1 left by e-1 positions, then OR it with the current mask. Bitwise OR rule: A bit becomes 1 if either side is 1
-            subsets.append((bitmask, size, idx)) # a list of tuples, subset 1 to m
-    return n, m, subsets
+import heapq
+import itertools
+import multiprocessing
+from array import array
+from collections import deque, OrderedDict
+from incumbent import new_incumbent, offer
+from instance import read_bitmasks
+
+#we use bitmasking(a binary number to store a set) to make the best solution finding process more efficient. We use a decimal number to represent a binary number, and that binary number’s bit positions tell us whether each element is in or out of a subset: bit e-1 is 1 if element e is in the subset
+#the file is streamed and checked by read_bitmasks() in instance.py, which raises InstanceError on a malformed or uncoverable instance
+def read_input_bnb(filename, progress=None, costs=None):
+    return read_bitmasks(filename, progress, costs) # n, m and a list of (bitmask, size, idx) tuples, subset 1 to m
+
+# build the (bitmask, size, idx) tuples of read_input_bnb() from subsets given as sets of elements 1..n
+def bitmasks_from_sets(subsets):
+    result = []
+    for idx, subset in enumerate(subsets):
+        bitmask = 0
+        for e in subset:
+            bitmask |= 1 << (e - 1)
+        result.append((bitmask, len(subset), idx))
+    return result
 
 # We use a greedy algorithm to find a bounding solution, providing an upper bound for pruning to make bnb more efficient
-def greedy_set_cover_bnb(n, subsets):
+# with costs (by original index) the greedy of greedy_set_cover_bnb_weighted() is used
+def greedy_set_cover_bnb(n, subsets, costs=None):
+    if costs is not None:
+        return greedy_set_cover_bnb_weighted(n, subsets, costs)
     universe = (1 << n) - 1 # Make bits 0 to n-1 are 1, by shifting 1 left n times, 1 at position n, and 0s everywhere else(starting from position 0). And subtracting 1 flips all the bits below position n to 1
     covered = 0 #also a bitmask, tracks which elements in the universe have already been covered by the subsets we've selected so far
     selected = [] #store the indices of selected subsets that we pick for our solution
@@ -50,71 +59,579 @@ def greedy_set_cover_bnb(n, subsets):
         remaining_subsets.pop(best_idx) #Remove it from the list so it won’t be picked again
     return selected
 
-# We use Breadth-First Search to implement BnB
-def branch_and_bound(n, subsets, cutoff_time, initial_size, start_time, trace, initial_solution):
+# weighted greedy on the bitmasks: the subset with the smallest cost per newly covered element, smallest index on ties
+def greedy_set_cover_bnb_weighted(n, subsets, costs):
+    universe = (1 << n) - 1
+    covered = 0
+    selected = []
+    while covered != universe:
+        best_ratio = None
+        for bitmask, size, original_idx in subsets:
+            gain = bin(bitmask & ~covered).count('1')
+            if gain > 0 and (best_ratio is None or costs[original_idx] / gain < best_ratio):
+                best_ratio = costs[original_idx] / gain
+                best_subset = bitmask
+                best_original_idx = original_idx
+        if best_ratio is None:
+            raise ValueError("No feasible solution exists.")
+        covered |= best_subset
+        selected.append(best_original_idx)
+    return selected
+
+# search strategies for the BnB frontier
+# bfs: FIFO queue, dfs: explicit stack, best: heap on lower bound, hybrid: best-first until node_cap nodes are queued, then dfs
+STRATEGIES = ["bfs", "dfs", "best", "hybrid"]
+
+# number of frontier nodes a checkpoint save is timed on before the first save (see branch_and_bound())
+SAVE_SAMPLE = 1000
+
+# branching rules
+# subset: include/exclude the subsets one by one, largest first
+# element: take the uncovered element with the fewest subsets left to cover it and branch on which subset covers it
+BRANCHINGS = ["subset", "element"]
+
+# lower bounds on the number of subsets a node still needs
+# size: uncovered elements divided by the largest subset left
+# packing: number of uncovered elements that no remaining subset covers two of (and at least the size bound)
+# dual: feasible LP dual where every element weighs 1 / (size of the largest subset covering it) (and at least the size bound)
+# with costs they bound the cost still needed: size uses the smallest cost per element of the subsets left, packing
+# sums the cheapest subset covering every packed element, dual weighs every element by the smallest cost per element
+# of the subsets covering it
+BOUNDS = ["size", "packing", "dual"]
+
+# The frontier holds the nodes (i, covered, count, selected, banned, lower_bound, hint) that are still to be explored
+# selected is the path of the node, a persistent linked list of the chosen subsets: None for the root, else
+# (original index of the last subset, path of the parent). Children share the path of their parent, so a node
+# costs O(1) memory whatever its depth, and the list of subsets is only built by path_to_list() for a new best cover
+# push() and pop() hide how the strategy orders them, so the search loop is the same for every strategy. The search
+# loop itself takes the raw operations() instead, they skip the peak and the hybrid switch of push()
+class Frontier:
+    def __init__(self, strategy, node_cap):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        self.strategy = "best" if strategy == "hybrid" else strategy
+        self.hybrid = strategy == "hybrid"
+        self.node_cap = node_cap
+        self.nodes = deque() if strategy == "bfs" else []
+        self.order = itertools.count() # tie-breaker for the heap, equal bounds are explored in the order they were pushed
+        self.peak = 0 # largest number of nodes held at once
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def push(self, node):
+        if self.strategy == "best":
+            heapq.heappush(self.nodes, (node[5], -node[0], next(self.order), node)) # smallest lower bound first, deeper nodes first on ties
+            if self.hybrid and len(self.nodes) > self.node_cap:
+                self.switch_to_dfs()
+        else:
+            self.nodes.append(node)
+        self.peak = max(self.peak, len(self.nodes))
+
+    def pop(self):
+        if self.strategy == "bfs":
+            return self.nodes.popleft() #BFS is FIFO. Take the next node from the front of the queue
+        if self.strategy == "best":
+            return heapq.heappop(self.nodes)[-1]
+        return self.nodes.pop() #DFS is LIFO. Take the last node pushed
+
+    # push and pop functions of the current strategy without any bookkeeping, for the search loop: the caller keeps
+    # the peak and calls switch_to_dfs() (then takes the new operations) once a hybrid frontier holds node_cap nodes
+    def operations(self):
+        if self.strategy == "best":
+            nodes = self.nodes
+            order = self.order
+            def push(node):
+                heapq.heappush(nodes, (node[5], -node[0], next(order), node))
+            def pop():
+                return heapq.heappop(nodes)[-1]
+            return push, pop
+        if self.strategy == "bfs":
+            return self.nodes.append, self.nodes.popleft
+        return self.nodes.append, self.nodes.pop
+
+    # up to k nodes of the frontier in any order, cheaper than items()
+    def sample(self, k):
+        return [entry[-1] if self.strategy == "best" else entry for entry in itertools.islice(self.nodes, k)]
+
+    # the nodes in the order they would be popped (heap entries in pop order), pushing them again rebuilds the frontier
+    def items(self):
+        if self.strategy == "best":
+            return [entry[-1] for entry in sorted(self.nodes)]
+        return list(self.nodes) # bfs queue from front to back, dfs stack from bottom to top
+
+    # the best-first heap grows with the width of the tree, once it holds node_cap nodes we keep
+    # going depth-first, whose stack only grows with the depth. The best nodes are put on top of the stack
+    def switch_to_dfs(self):
+        entries = sorted(self.nodes, reverse=True)
+        self.nodes = [entry[-1] for entry in entries]
+        self.strategy = "dfs"
+
+# positions of the 1 bits of a bitmask, reading its binary string is much faster than shifting a big int bit by bit
+def bit_positions(bitmask):
+    digits = bin(bitmask)[:1:-1]
+    positions = []
+    k = digits.find('1')
+    while k != -1:
+        positions.append(k)
+        k = digits.find('1', k + 1)
+    return positions
+
+# the subsets (original indices) of a node path, in the order they were chosen
+def path_to_list(path):
+    solution = []
+    while path is not None:
+        idx, path = path
+        solution.append(idx)
+    solution.reverse()
+    return solution
+
+# the paths of the nodes as a table of cells for the checkpoints: cell k is (original index, row of its parent cell or -1),
+# parents come before their children. Every shared cell is saved once, so saving and restoring the paths is linear in
+# the number of cells instead of the total length of the paths. Return the table and the row of every path (-1 for None)
+def paths_to_table(paths):
+    rows = {} # id() of a cell -> its row
+    indices = array('i')
+    parents = array('i')
+    ends = []
+    for path in paths:
+        chain = [] # cells of the path that are not in the table yet, deepest first
+        while path is not None and id(path) not in rows:
+            chain.append(path)
+            path = path[1]
+        row = -1 if path is None else rows[id(path)]
+        for cell in reversed(chain):
+            indices.append(cell[0])
+            parents.append(row)
+            row = len(indices) - 1
+            rows[id(cell)] = row
+        ends.append(row)
+    return (indices, parents), ends
+
+# the paths of a table built by paths_to_table(), sharing their cells again
+def table_to_paths(table, ends):
+    indices, parents = table
+    cells = []
+    for idx, parent in zip(indices, parents):
+        cells.append((idx, cells[parent] if parent >= 0 else None))
+    return [cells[row] if row >= 0 else None for row in ends]
+
+# the tables of a search that only depend on the instance and the options: the subsets in branching order with their
+# bitmasks, sizes and costs, the element -> subsets bitmasks (element branching and packing bound) and the dual weights
+# (dual bound), None where the options do not need them. parallel_branch_and_bound() builds them once per worker
+# process, every subtree it searches shares them
+class SearchTables:
+    def __init__(self, n, subsets, branching, bound, costs=None):
+        self.step = self.ratios = self.integral = None
+        self.degree = self.cheapest = self.cover = self.weight = None
+        if costs is None:
+            sorted_subsets = sorted(subsets, key=lambda x: (-x[1], x[2]))
+        else:
+            # empty subsets never help a cover and have no cost per element, they are left out
+            sorted_subsets = sorted((subset for subset in subsets if subset[1] > 0), key=lambda x: (costs[x[2]] / x[1], x[2]))
+            self.step = [costs[idx] for _, _, idx in sorted_subsets] # what including the subset adds to the count
+            self.ratios = [costs[idx] / size for _, size, idx in sorted_subsets] # ratios[i] is also the smallest ratio from index i to the end
+            self.integral = all(isinstance(cost, int) for cost in self.step) # bounds of integer costs can be rounded up
+        m = len(sorted_subsets)
+        self.sorted_subsets = sorted_subsets
+        self.masks = masks = [bitmask for bitmask, _, _ in sorted_subsets]
+        self.sizes = sizes = [size for _, size, _ in sorted_subsets] # sizes[i] is also the largest size of any subset from index i to the end (without costs)
+
+        # element -> bitmask of the sorted positions of the subsets covering it, and its number of subsets
+        if branching == "element" or bound == "packing":
+            covering = [[] for _ in range(n)]
+            for pos, bitmask in enumerate(masks):
+                for e in bit_positions(bitmask):
+                    covering[e].append(pos)
+            self.degree = [len(positions) for positions in covering]
+            if costs is not None:
+                self.cheapest = [min((self.step[pos] for pos in positions), default=0) for positions in covering]
+            self.cover = []
+            for positions in covering:
+                row = bytearray((m + 7) // 8)
+                for pos in positions:
+                    row[pos >> 3] |= 1 << (pos & 7)
+                self.cover.append(int.from_bytes(row, 'little'))
+
+        # static dual weight of every element: 1 / size of the largest subset covering it (smallest cost per element with costs)
+        if bound == "dual":
+            self.weight = weight = [0.0] * n
+            for bitmask, per_element in zip(masks, [1.0 / size if size else 0.0 for size in sizes] if costs is None else self.ratios):
+                for e in bit_positions(bitmask):
+                    if weight[e] == 0.0:
+                        weight[e] = per_element # subsets are sorted by size (by ratio with costs), the first one covering e is the best
+
+# We use Breadth-First Search to implement BnB by default, strategy selects another order from STRATEGIES
+# branching and bound select the branching rule and the lower bound (see BRANCHINGS and BOUNDS)
+# if a stats dict is given, it is filled with the node counts and the pruning rate of the search
+# parallel_branch_and_bound() uses these parameters:
+# - roots: nodes to start from instead of the root of the tree
+# - split: if a list is given, the nodes reaching depth split_depth are appended to it instead of being expanded,
+#   and the whole frontier is appended once the frontier and split hold split_nodes nodes or the search has run
+#   for split_time seconds, so the split ends early when the tree is wide
+# - incumbent: best size shared by all processes (see incumbent.py), used for pruning and updated on every improvement
+# - tables: the SearchTables of the instance and options, built if not given
+# on_improve(time, size) is called for every point added to the trace
+# table_size bounds the transposition table (0 disables it): two nodes with the same subtree, the same (i, covered)
+# for subset branching or the same (banned, covered) for element branching, only differ by their count, so a child
+# is dropped before it is queued if the table has already seen its subtree with a count as small. The least
+# recently used entries are evicted once the table is full
+# checkpoint (see checkpoint.py) saves the frontier, the best cover and the trace periodically and when the search stops,
+# the paths of the nodes are saved as a table of their shared cells. The search stops early by the time the last save
+# takes for a frontier that large (timed on a sample of the frontier before the first save), so the final save fits
+# in the cutoff. resume is such a saved state: the search continues from its frontier and best cover (initial_size and
+# initial_solution are not used), its trace is copied into trace and the time of the previous runs counts in the
+# trace, so cutoff_time is the time of this run, counted from the moment the checkpoint started loading
+# target is a size the search stops at (e.g. a proven lower bound of the whole instance, see bounds.py), a cover
+# that small is good enough even if the tree is not fully explored
+# costs are the costs of the subsets (by original index) of a weighted instance: the count of a node is then the cost
+# of its subsets, initial_size, the trace, the incumbent and target hold costs, and the subsets are tried in order
+# of cost per element instead of size
+def branch_and_bound(n, subsets, cutoff_time, initial_size, start_time, trace, initial_solution,
+                     strategy="bfs", node_cap=1000000, branching="subset", bound="size", stats=None,
+                     roots=None, split=None, split_depth=0, incumbent=None, on_improve=None, table_size=0,
+                     checkpoint=None, resume=None, target=None, costs=None, split_nodes=math.inf, split_time=math.inf,
+                     tables=None):
+    if branching not in BRANCHINGS:
+        raise ValueError(f"Unknown branching rule: {branching}")
+    if bound not in BOUNDS:
+        raise ValueError(f"Unknown lower bound: {bound}")
+
     #step1: Initialization
-    sorted_subsets = sorted(subsets, key=lambda x: (-x[1], x[2]))
+    if tables is None:
+        tables = SearchTables(n, subsets, branching, bound, costs)
+    sorted_subsets, masks, sizes = tables.sorted_subsets, tables.masks, tables.sizes
+    step, ratios, integral = tables.step, tables.ratios, tables.integral
+    degree, cheapest, cover, weight = tables.degree, tables.cheapest, tables.cover, tables.weight
     m = len(sorted_subsets)
-    max_remaining = [0] * m # initialize a list with m zeros, and max_remaining[i] will store the largest size of any subset from index i to the end
-    if m > 0:
-        max_remaining[-1] = sorted_subsets[-1][1]
-        for i in range(m-2, -1, -1):
-            max_remaining[i] = max(sorted_subsets[i][1], max_remaining[i+1])
     all_covered = (1 << n) - 1
+    all_subsets = (1 << m) - 1 # sets of subsets are bitmasks over the sorted positions
     best_solution = initial_solution.copy() #the greedy solution is used as the initial solution
     best_size = initial_size
+    if resume is not None:
+        best_solution = list(resume["best_solution"])
+        best_size = resume["best_size"]
+        roots = [node[:3] + (path,) + node[4:] for node, path in zip(resume["nodes"], table_to_paths(*resume["paths"]))]
+        trace[:] = resume["trace"]
 
-    #step2: BFS
-    queue = deque([(0, 0, 0, [])])
-    while queue and (time.time() - start_time) < cutoff_time:
-        i, covered, count, selected = queue.popleft()  #BFS is FIFO. Take the next node from the front of the queue
+    # a fractional bound of the cost still needed, rounded up when the costs are integers
+    def round_up(value):
+        return math.ceil(value - 1e-9) if costs is None or integral else value
 
-        if covered == all_covered:
-            if count < best_size: #If all elements are covered, update the best solution if this one is smaller
-                best_size = count
-                best_solution = selected.copy()
-                trace.append((time.time() - start_time, best_size))
+    # lower bound of a node that covers covered with count subsets and can still use the subsets in available
+    # first is the smallest sorted position in available (m if it is empty), it gives the largest subset left (the
+    # cheapest per element with costs). With subset branching available is every position from first on, it is only
+    # built as a bitmask when the packing bound needs it (available=None)
+    # hint is the bound state of the parent (packed elements or remaining dual weight) so it is not rebuilt from scratch
+    # return the lower bound and the hint for the children
+    def lower_bound(covered, first, count, hint, available=None):
+        remaining = all_covered & (~covered)
+        if remaining == 0:
+            return count, hint
+        if first >= m:
+            return float('inf'), hint
+
+        # the size bound is cheap, the stronger bounds are combined with it
+        num_uncovered = bin(remaining).count('1') #Count how many elements are left to cover
+        if costs is None:
+            remaining_max = sizes[first] # largest subset left
+            if remaining_max == 0: # only empty subsets are left
+                return float('inf'), hint
+            size_bound = count + (num_uncovered + remaining_max - 1) // remaining_max #The best-case estimate of how many subsets we still need, starting from a partial solution
+        else:
+            size_bound = count + round_up(num_uncovered * ratios[first]) # cheapest ratio left
+        if bound == "size":
+            return size_bound, hint
+
+        if bound == "dual":
+            return max(size_bound, count + round_up(hint)), hint
+
+        # packing: every packed element needs its own subset. The elements packed by the parent are still
+        # pairwise disjoint here (fewer subsets are available), so they are kept and the packing is extended
+        if available is None:
+            available = subsets_from(first)
+        used = 0
+        packed = []
+        for e in hint:
+            if remaining >> e & 1:
+                subsets_left = cover[e] & available
+                if subsets_left == 0:
+                    return float('inf'), hint # an element nothing can cover anymore
+                used |= subsets_left
+                packed.append(e)
+        for e in sorted(bit_positions(remaining), key=degree.__getitem__): # rare elements first, they block fewer others
+            subsets_left = cover[e] & available
+            if subsets_left == 0:
+                return float('inf'), hint
+            if subsets_left & used == 0:
+                used |= subsets_left
+                packed.append(e)
+        if costs is not None:
+            return max(size_bound, count + sum(cheapest[e] for e in packed)), packed
+        return max(size_bound, count + len(packed)), packed
+
+    # hint of a child that adds subset pos to a node covering covered
+    def child_hint(hint, covered, pos):
+        if bound == "dual":
+            return hint - sum(weight[e] for e in bit_positions(masks[pos] & ~covered))
+        return hint
+
+    # bitmask of the subsets left to a node with branch index i
+    def subsets_from(i):
+        return all_subsets ^ ((1 << i) - 1)
+
+    expanded = 0 # nodes whose children were generated
+    generated = 0 # children generated
+    pruned = 0 # nodes and children cut by the lower bound
+    queued = 0 # nodes pushed on the frontier
+
+    table = OrderedDict() if table_size > 0 else None # subtree key -> smallest count seen
+    lookups = 0 # children looked up in the table
+    hits = 0 # children dropped because the table had seen their subtree with a count as small
+    evictions = 0
+    table_bytes = 0 # estimated memory of the table entries
+
+    #step2: search
+    frontier = Frontier(strategy, node_cap)
+    if roots is None:
+        root_hint = sum(weight) if bound == "dual" else (() if bound == "packing" else None)
+        root_bound, root_hint = lower_bound(0, 0, 0, root_hint)
+        roots = [(0, 0, 0, None, 0, root_bound, root_hint)]
+    for node in roots:
+        frontier.push(node)
+        queued += 1
+    save_rate = 0.0 # seconds per frontier node a save takes
+    max_reserve = cutoff_time * 0.9 # time of this run kept for the final save at most, the search still makes progress
+    if resume is not None: # the clock of this run started with the load of the checkpoint
+        save_rate = resume["save_time"] / max(len(resume["nodes"]), 1)
+        start_time = resume["load_start"] - resume["elapsed"]
+        cutoff_time += resume["elapsed"]
+    # state saved by the checkpoints, the paths of the nodes are saved apart as a table of their shared cells
+    def checkpoint_state(items=None):
+        if items is None:
+            items = frontier.items()
+        nodes = [node[:3] + (None,) + node[4:] for node in items]
+        paths = paths_to_table([node[3] for node in items])
+        return {"nodes": nodes, "paths": paths, "best_solution": best_solution, "best_size": best_size,
+                "trace": list(trace), "elapsed": time.time() - start_time}
+
+    def save():
+        nonlocal save_rate
+        start = time.time()
+        checkpoint.save(checkpoint_state(), start)
+        save_rate = checkpoint.duration / max(len(frontier), 1)
+
+    # seconds per node of a save, timed on a sample of the frontier so the first slice keeps time for its final save too
+    def estimate_save_rate():
+        start = time.time()
+        sample = frontier.sample(SAVE_SAMPLE)
+        checkpoint.encode(checkpoint_state(sample))
+        return (time.time() - start) / len(sample)
+
+    push, pop = frontier.operations()
+    nodes = frontier.nodes
+    peak = frontier.peak
+    while nodes and (time.time() - start_time) < cutoff_time - min(save_rate * len(nodes), max_reserve):
+        if checkpoint is not None and checkpoint.due():
+            save()
+        if incumbent is not None and incumbent.value < best_size: # another process found a better cover
+            best_size = incumbent.value
+        if target is not None and best_size <= target:
+            break
+        i, covered, count, selected, banned, node_bound, hint = pop()
+
+        if node_bound >= best_size: #if lower bound >= upper bound, then cut the subtree (the upper bound may have improved since it was pushed)
+            pruned += 1
             continue
 
-        if i >= m:
+        if covered == all_covered: #If all elements are covered, update the best solution since this one is smaller
+            best_size = count
+            best_solution = path_to_list(selected)
+            trace.append((time.time() - start_time, best_size))
+            if on_improve is not None:
+                on_improve(*trace[-1])
+            if incumbent is not None:
+                offer(incumbent, best_size)
             continue
 
-        remaining_elements = all_covered & (~covered) 
-        num_uncovered = bin(remaining_elements).count('1') #Count how many elements are left to cover
-        if num_uncovered == 0:
-            if count < best_size:
-                best_size = count
-                best_solution = selected.copy()
-                trace.append((time.time() - start_time, best_size))
+        if branching == "subset" and i >= m:
             continue
 
-        #3.Lower Bound Calculation
-        if i + 1 < m:
-            remaining_max = max_remaining[i + 1]
-        else:
-            remaining_max = 0
+        if split is not None and i >= split_depth: # the subtree is left to another process
+            split.append((i, covered, count, selected, banned, node_bound, hint))
+            continue
+
+        expanded += 1
+        children = []
+        if branching == "subset":
+            original_idx = sorted_subsets[i][2]
+
+            # 1.exclude current subset
+            child_bound, new_hint = lower_bound(covered, i + 1, count, hint)
+            children.append((i + 1, covered, count, selected, 0, child_bound, new_hint))
+
+            # 2.include current subset, pushed last so that dfs dives into it first
+            new_covered = covered | masks[i] #What we would cover if we include this subset
+            if new_covered != covered:
+                new_count = count + 1 if costs is None else count + step[i]
+                child_bound, new_hint = lower_bound(new_covered, i + 1, new_count, child_hint(hint, covered, i))
+                children.append((i + 1, new_covered, new_count, (original_idx, selected), 0, child_bound, new_hint))
 
-        if remaining_max == 0:
-            lower_bound = float('inf') if num_uncovered > 0 else count
         else:
-            lower_bound = count + (num_uncovered + remaining_max - 1) // remaining_max #The best-case estimate of how many subsets we still need, starting from a partial solution
-
-        current_bitmask, _, original_idx = sorted_subsets[i]
-        new_covered = covered | current_bitmask #What we would cover if we include this subset
-        
-        if lower_bound >= best_size:#if lower bound > upper bound, then cut the subtree
-            if new_covered != covered and (count + 1) < best_size: #Compute coverage if we include subset i
-                new_selected = selected.copy()
-                new_selected.append(original_idx)
-                queue.append((i + 1, new_covered, count + 1, new_selected))
-
-        else: # If lower bound is promising, add two branches
-            queue.append((i + 1, covered, count, selected.copy()))  # 1.exclude current subset
-            if new_covered != covered and (count + 1) < best_size: # 2.include current subset
-                new_selected = selected.copy()
-                new_selected.append(original_idx)
-                queue.append((i + 1, new_covered, count + 1, new_selected))
+            available = all_subsets & ~banned
+            # the uncovered element with the fewest subsets left to cover it
+            best_left = None
+            for e in bit_positions(all_covered & ~covered):
+                subsets_left = cover[e] & available
+                if best_left is None or bin(subsets_left).count('1') < bin(best_left).count('1'):
+                    best_left = subsets_left
+                    if best_left == 0:
+                        break
+
+            # one child per subset covering it, largest subset first (smallest cost per element with costs). Child k bans
+            # the subsets of children 0..k-1 so the same cover is never reached twice. Pushed in reverse so that dfs dives
+            # into the largest one first
+            child_banned = banned
+            for pos in bit_positions(best_left):
+                new_covered = covered | masks[pos]
+                new_count = count + 1 if costs is None else count + step[pos]
+                child_available = available & ~child_banned
+                child_first = (child_available & -child_available).bit_length() - 1 if child_available else m
+                child_bound, new_hint = lower_bound(new_covered, child_first, new_count, child_hint(hint, covered, pos), child_available)
+                children.append((i + 1, new_covered, new_count, (sorted_subsets[pos][2], selected), child_banned, child_bound, new_hint))
+                child_banned |= 1 << pos
+            children.reverse()
+
+        generated += len(children)
+        for child in children:
+            if child[5] >= best_size:
+                pruned += 1
+                continue
+            if table is not None:
+                key = (child[0] if branching == "subset" else child[4], child[1])
+                seen = table.get(key)
+                lookups += 1
+                if seen is not None and seen <= child[2]:
+                    hits += 1
+                    table.move_to_end(key)
+                    continue
+                if seen is None:
+                    table_bytes += 120 + sys.getsizeof(key[0]) + sys.getsizeof(key[1]) # dict entry and links, key tuple and its ints
+                table[key] = child[2]
+                table.move_to_end(key)
+                if len(table) > table_size:
+                    old_key, _ = table.popitem(last=False)
+                    table_bytes -= 120 + sys.getsizeof(old_key[0]) + sys.getsizeof(old_key[1])
+                    evictions += 1
+            push(child)
+            queued += 1
+        if split is not None and (len(nodes) + len(split) >= split_nodes or time.time() - start_time > split_time):
+            split.extend(frontier.items()) # enough subtrees for the workers, they take the whole frontier
+            nodes.clear()
+        if len(nodes) > peak:
+            peak = len(nodes)
+            if save_rate == 0.0 and checkpoint is not None and peak >= SAVE_SAMPLE:
+                save_rate = estimate_save_rate()
+            if frontier.hybrid and frontier.strategy == "best" and peak > node_cap:
+                frontier.switch_to_dfs()
+                push, pop = frontier.operations()
+                nodes = frontier.nodes
+
+    frontier.peak = max(frontier.peak, peak)
+    if checkpoint is not None:
+        save()
+    if stats is not None:
+        stats["expanded"] = expanded
+        stats["generated"] = generated
+        stats["pruned"] = pruned
+        stats["queued"] = queued
+        stats["peak_frontier"] = frontier.peak
+        stats["prune_rate"] = pruned / max(1, generated) # share of the generated nodes that were cut, when pushed or when popped
+        stats["complete"] = len(frontier) == 0 # the whole tree was explored (or handed over in split), best_solution is optimal
+        stats["target_reached"] = target is not None and best_size <= target
+        if table is not None:
+            stats["table_lookups"] = lookups
+            stats["table_hits"] = hits
+            stats["table_hit_rate"] = hits / max(1, lookups)
+            stats["table_entries"] = len(table)
+            stats["table_evictions"] = evictions
+            stats["table_bytes"] = table_bytes
+    return best_solution
+
+# subtrees handed to the workers per worker process: enough to balance the load, few enough to split quickly
+SUBTREES_PER_WORKER = 8
+# the roots are searched in chunks, every worker gets about this many chunks
+CHUNKS_PER_WORKER = 2
+
+# state of a parallel BnB worker process, set once by init_bnb_worker(), with the SearchTables of the instance
+_worker = {}
+
+def init_bnb_worker(n, subsets, cutoff_time, start_time, options, incumbent):
+    tables = SearchTables(n, subsets, options.get("branching", "subset"), options.get("bound", "size"), options.get("costs"))
+    _worker.update(n=n, subsets=subsets, cutoff_time=cutoff_time, start_time=start_time, options=options, incumbent=incumbent,
+                   tables=tables)
+
+# search a chunk of subtrees together with the shared incumbent
+# return the best cover found in them (None if it did not beat the incumbent), its trace and its node stats
+def search_subtree(roots):
+    trace = []
+    stats = {}
+    incumbent = _worker["incumbent"]
+    solution = branch_and_bound(_worker["n"], _worker["subsets"], _worker["cutoff_time"], incumbent.value, _worker["start_time"],
+                                trace, [], stats=stats, roots=roots, incumbent=incumbent, tables=_worker["tables"],
+                                **_worker["options"])
+    return (solution if trace else None), trace, stats
+
+# Parallel BnB: the tree is explored breadth-first down to split_depth, or until it holds SUBTREES_PER_WORKER nodes
+# per worker, or for a tenth of the cutoff, whichever comes first. The nodes left are dealt round-robin into
+# CHUNKS_PER_WORKER chunks per worker and every chunk is searched on a pool of workers processes. The workers share the
+# best size through incumbent.py so every improvement is used for pruning by all of them at once
+# the best cover is the smallest one, the first chunk in order wins ties, and the traces are merged in time order
+# on_improve is called during the split, the improvements of the subtrees are only reported once they are merged
+def parallel_branch_and_bound(n, subsets, cutoff_time, initial_size, start_time, trace, initial_solution,
+                              workers=None, split_depth=8, stats=None, on_improve=None, **options):
+    workers = workers or os.cpu_count() or 1
+    incumbent = new_incumbent(initial_size)
+    split = []
+    split_stats = {}
+    best_solution = branch_and_bound(n, subsets, cutoff_time, initial_size, start_time, trace, initial_solution,
+                                     **dict(options, strategy="bfs"), stats=split_stats, split=split, split_depth=split_depth,
+                                     incumbent=incumbent, on_improve=on_improve, split_nodes=SUBTREES_PER_WORKER * workers,
+                                     split_time=cutoff_time / 10)
+
+    results = []
+    if split and time.time() - start_time < cutoff_time:
+        chunks = [split[k::CHUNKS_PER_WORKER * workers] for k in range(min(len(split), CHUNKS_PER_WORKER * workers))]
+        with multiprocessing.Pool(workers, initializer=init_bnb_worker,
+                                  initargs=(n, subsets, cutoff_time, start_time, options, incumbent)) as pool:
+            results = pool.map(search_subtree, chunks, chunksize=1) # one chunk at a time, idle workers take the next one
+
+    points = []
+    all_stats = [split_stats]
+    best_size = trace[-1][1] # size (cost with costs) of best_solution
+    for solution, subtree_trace, subtree_stats in results:
+        if solution is not None and subtree_trace[-1][1] < best_size:
+            best_solution, best_size = solution, subtree_trace[-1][1]
+        points += subtree_trace
+        all_stats.append(subtree_stats)
+    for t, q in sorted(points):
+        if q < trace[-1][1]:
+            trace.append((t, q))
+            if on_improve is not None:
+                on_improve(t, q)
 
+    if stats is not None:
+        for key in ("expanded", "generated", "pruned", "queued"):
+            stats[key] = sum(s[key] for s in all_stats)
+        stats["peak_frontier"] = max(s["peak_frontier"] for s in all_stats)
+        stats["prune_rate"] = stats["pruned"] / max(1, stats["generated"])
+        stats["complete"] = all(s["complete"] for s in all_stats)
+        stats["target_reached"] = any(s["target_reached"] for s in all_stats)
+        stats["subtrees"] = len(split)
+        if "table_lookups" in split_stats: # every process has its own table
+            for key in ("table_lookups", "table_hits", "table_entries", "table_evictions", "table_bytes"):
+                stats[key] = sum(s[key] for s in all_stats)
+            stats["table_hit_rate"] = stats["table_hits"] / max(1, stats["table_lookups"])
     return best_solution
 
 def main():
@@ -124,7 +641,7 @@ def main():
     parser.add_argument('-time', type=float, required=True)
     args = parser.parse_args()
 
-    n, m, subsets = read_input(args.inst)
+    n, m, subsets = read_input_bnb(args.inst)
     try:
         initial_solution = greedy_set_cover_bnb(n, subsets)
     except ValueError as e:
@@ -5,6 +5,16 @@
 import random
 import time
 import math
+from coverage import CoverageState
+from incumbent import offer
+from bitset import BitsetKernel
+from hill import eliminate_redundant
+from approx import greedy_set_cover_weighted
+
+# engines of simulated_annealing()
+# anneal: the original simulated annealing with a geometric cooling schedule
+# weighted: weighted_local_search(), element weighting with configuration checking, it runs until the cutoff
+ENGINES = ["anneal", "weighted"]
 
 # check whether the solution is a valid cover: return true or false
 def is_valid_cover(universe,solution_indices,subsets):
@@ -12,12 +22,22 @@ def is_valid_cover(universe,solution_indices,subsets):
     covered = set().union(*(subsets[i] for i in solution_indices))
     return covered == universe
 
-# check the cost of solution: return the length of the solution
-def cost(solution):
-    return len(solution)
+# check the cost of solution: return the length of the solution, or the sum of its costs for a weighted instance
+# the searches keep the cost of their solution up to date instead (see CoverageState.cost)
+def cost(solution, costs=None):
+    if costs is None:
+        return len(solution)
+    return sum(costs[i] for i in solution)
 
 # get the initial solution: return a list of indices in the solution
-def get_initial_solution(universe, subsets):
+# with a BitsetKernel of the instance the gains are computed by the kernel instead of set intersections
+# with costs, it is the weighted greedy cover of approx.py
+def get_initial_solution(universe, subsets, kernel=None, costs=None):
+    if costs is not None:
+        return [idx - 1 for idx in greedy_set_cover_weighted(universe, subsets, costs)]
+    if kernel is not None:
+        return kernel.greedy()
+
     uncovered = set(universe) # the uncovered part to universe
     solution_indices = []
 
@@ -29,76 +49,99 @@ def get_initial_solution(universe, subsets):
 
     return solution_indices
 
-# get the neighbor based on current solution
-def get_neighbor(current_solution, subsets, universe):
-
-    neighbor = current_solution[:]
+# apply a random move to the coverage state of the current solution
+# the move stays in state.log so that the caller can keep it with state.commit() or revert it with state.undo()
+def get_neighbor(state):
 
     action = random.choice(["add", "remove", "swap"]) # randomly choose three actions
 
-    # remove a random subset from the list 
-    if action == "remove" and len(neighbor) > 1:
-        choices = neighbor # have a list of choices which for now is current solution
-
-        to_remove = random.choice(choices) #  randomly choose an index for remove
-        test = list(set(neighbor)-set([to_remove])) # remove the choice from the neighbor
-        choices = test # update the choice list
+    # remove a random subset from the solution
+    if action == "remove" and len(state.solution) > 1:
+        # try the chosen subsets in random order until one can be removed or there's no choice left
+        for to_remove in state.shuffled(state.solution):
+            if state.can_remove(to_remove):
+                state.remove(to_remove)
+                break
 
-        # loop the same process as before until finding a valid cover or there's no choice for index to remove
-        while not is_valid_cover(universe, test,subsets) and len(choices) > 0:
-            to_remove = random.choice(choices) 
-            test = list(set(neighbor)-set([to_remove]))
-            choices = list(set(choices)-set([to_remove]))
-
-        if is_valid_cover(universe, test,subsets):
-            neighbor = test
-      
-            
     # add a random subset from the list
     elif action == "add":
-        candidate = random.choice(range(len(subsets))) # choose a random candidate for adding
-        if candidate not in neighbor:
-            neighbor.append(candidate)
-    
-    # swap a subset with a new one
-    elif action == "swap" and len(neighbor) > 0 and len(neighbor) < len(subsets):
-
-        to_remove = random.choice(neighbor)# randomly choose an index from the current solution to remove
-    
-        not_neighbor = list(set(range(len(subsets))) - set(neighbor))# the list of the index that not in the current solution
-        
-        to_add = random.choice([s for s in not_neighbor])# randomly choose an index not from the current solution to add
-        ori_list = list(set(neighbor)-set([to_remove]))
-        test = ori_list + [to_add] # merge the rest of original current solution and newly added index
-        not_neighbor = list(set(not_neighbor)-set([to_add])) # update the list of index that are not in new solution
+        candidate = random.randrange(len(state.subsets)) # choose a random candidate for adding
+        if not state.chosen[candidate]:
+            state.add(candidate)
 
-        # loop same process as before until it find one valid solution or there's no choice for adding 
-        while not is_valid_cover(universe, test,subsets) and len(not_neighbor) > 0: 
-            to_add = random.choice([s for s in not_neighbor]) 
-            ori_list = list(set(neighbor)-set([to_remove]))
-            test = ori_list + [to_add]
-            not_neighbor = list(set(not_neighbor)-set([to_add]))
+    # swap a subset with a new one
+    elif action == "swap" and len(state.solution) > 0 and len(state.outside) > 0:
 
-        # if a valid neiighbor is found
-        if is_valid_cover(universe, test,subsets): 
-            neighbor = test      
+        to_remove = random.choice(state.solution) # randomly choose an index from the current solution to remove
 
-    return neighbor
+        # try the subsets not in the solution in random order until one keeps a valid cover or there's no choice left
+        for to_add in state.shuffled(state.outside):
+            if state.can_swap(to_remove, to_add):
+                state.swap(to_remove, to_add)
+                break
 
 # the algorithm for simulated annealing
-def simulated_annealing(universe, subsets, initial_temp=1, cooling_rate=0.95, max_iterations=10000,seed=42,cutoff = 1000):
+# with a shared incumbent (see incumbent.py) the best sizes are published to the other processes
+# if a stats dict is given, it is filled with the move counters of the search
+# on_improve(time, size) is called for every point added to the trace
+# initial_solution (a cover, 0-indexed) replaces the greedy start, e.g. for a warm start (see warm.py)
+# checkpoint (see checkpoint.py) saves the current and best solutions, the temperature, the random state and the trace
+# periodically and when the search stops, resume is such a saved state to continue from. The time of the previous
+# runs counts in the trace, cutoff is the time of this run
+# target is a size the search stops at (e.g. a proven lower bound, see bounds.py), None searches until the cutoff
+# costs are the costs of the subsets of a weighted instance: the search then minimizes the total cost, the trace, the
+# incumbent and target hold costs instead of sizes, and the temperature is scaled by the mean cost
+def simulated_annealing(universe, subsets, initial_temp=1, cooling_rate=0.95, max_iterations=10000,seed=42,cutoff = 1000,backend="set",incumbent=None,stats=None,engine="anneal",on_improve=None,
+                        initial_solution=None,checkpoint=None,resume=None,target=None,costs=None):
+    if engine == "weighted":
+        return weighted_local_search(universe, subsets, seed=seed, cutoff=cutoff, backend=backend, incumbent=incumbent, stats=stats,
+                                     on_improve=on_improve, initial_solution=initial_solution, checkpoint=checkpoint, resume=resume,
+                                     target=target, costs=costs)
+    if engine != "anneal":
+        raise ValueError(f"Unknown annealing engine: {engine}")
     start = time.time()
     trace_time = []
     trace_sol = []
     random.seed(seed)
-    current_solution = get_initial_solution(universe, subsets) # get initial solution 
-    best_solution = current_solution[:] # current best solution
-    print(len(best_solution))
-    trace_time.append(round(time.time() - start,4))
-    trace_sol.append(len(best_solution))
-    temperature = initial_temp # 
-    track_convergence = 0 # track if it convergence
-    for _ in range(max_iterations):
+    if resume is not None:
+        start = resume["load_start"] - resume["elapsed"] # the load of the checkpoint counts in this run
+        cutoff += resume["elapsed"]
+        random.setstate(resume["random"])
+        state = CoverageState(universe, subsets, resume["solution"], costs)
+        best_solution = list(resume["best_solution"])
+        trace_time, trace_sol = list(resume["trace_time"]), list(resume["trace_sol"])
+        temperature = resume["temperature"]
+        track_convergence = resume["track_convergence"]
+        first = resume["iteration"]
+    else:
+        if initial_solution is None:
+            kernel = BitsetKernel(universe, subsets) if backend == "bitset" and costs is None else None
+            initial_solution = get_initial_solution(universe, subsets, kernel, costs)
+        state = CoverageState(universe, subsets, initial_solution, costs) # coverage state of the initial solution
+        best_solution = state.solution[:] # current best solution
+        print(state.cost)
+        trace_time.append(round(time.time() - start,4))
+        trace_sol.append(state.cost)
+        if on_improve is not None:
+            on_improve(trace_time[-1], trace_sol[-1])
+        temperature = initial_temp # 
+        track_convergence = 0 # track if it convergence
+        first = 0
+    best_cost = cost(best_solution, costs)
+    if incumbent is not None:
+        offer(incumbent, best_cost)
+    scale = 1 if costs is None else sum(costs) / len(costs) # a move changes the cost by about one subset
+    iterations = moves = accepted = improvements = 0 # counters, kept in locals so they cost almost nothing
+
+    # state saved by the checkpoints
+    def checkpoint_state():
+        return {"solution": state.solution[:], "best_solution": best_solution[:], "temperature": temperature,
+                "track_convergence": track_convergence, "iteration": first + iterations, "random": random.getstate(),
+                "trace_time": trace_time[:], "trace_sol": trace_sol[:], "elapsed": time.time() - start}
+
+    for _ in range(first, max_iterations):
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(checkpoint_state())
         
         # conditions for breaking the loop
         if (time.time()-start) > cutoff:
@@ -107,25 +150,253 @@ def simulated_annealing(universe, subsets, initial_temp=1, cooling_rate=0.95, ma
             break
         if track_convergence > 1000: # if the best solution not being updated over 1000 times, cut it
             break
+        if target is not None and best_cost <= target: # the best solution is good enough
+            break
 
         track_convergence += 1
+        iterations += 1
 
-        neighbor = get_neighbor(current_solution, subsets, universe) # get neighbor
-        delta = cost(current_solution) - cost(neighbor) # calculate delta
+        current_cost = state.cost
+        get_neighbor(state) # move the state to a neighbor
+        delta = current_cost - state.cost # calculate delta
+        if state.log:
+            moves += 1
 
         if delta > 0:
-            current_solution = neighbor
+            state.commit()
+            accepted += 1
         
-        elif random.random() < math.exp(delta / temperature): # bad move with some probability
-            current_solution = neighbor
+        elif random.random() < math.exp(delta / (temperature * scale)): # bad move with some probability
+            state.commit()
+            accepted += 1
 
-        if cost(current_solution) < cost(best_solution): # record and track the best solution
+        else:
+            state.undo() # go back to the current solution
+
+        if state.cost < best_cost: # record and track the best solution
             track_convergence = 0
-            best_solution = current_solution
+            improvements += 1
+            best_solution = state.solution[:]
+            best_cost = state.cost
             trace_time.append(round(time.time() - start,4))
-            trace_sol.append(len(best_solution))
+            trace_sol.append(best_cost)
+            if on_improve is not None:
+                on_improve(trace_time[-1], trace_sol[-1])
+            if incumbent is not None:
+                offer(incumbent, best_cost)
 
         temperature *= cooling_rate # update the temperature
 
+    if checkpoint is not None:
+        checkpoint.save(checkpoint_state())
     final_time = trace_time[-1] # record the final time of the best overall solution 
-    return best_solution,trace_time,trace_sol,final_time
\ No newline at end of file
+    if stats is not None:
+        stats["iterations"] = iterations
+        stats["neighbors"] = moves # iterations where get_neighbor() found a move
+        stats["feasibility_checks"] = state.checks
+        stats["accepted"] = accepted
+        stats["rejected"] = iterations - accepted
+        stats["improvements"] = improvements
+    return best_solution,trace_time,trace_sol,final_time
+
+# element weighting local search for unicost set cover (in the style of NuSC and RWLS)
+# every element has a weight, a subset in the solution scores minus the weight of the elements only it covers,
+# a subset outside scores the weight of the uncovered elements it would cover. The scores are kept up to date on
+# every flip through the element cover counts. One step removes the best scoring subset (not the one added in the
+# previous step) and adds the best scoring subset covering a random uncovered element, among the subsets whose
+# configuration changed since they were removed (configuration checking), then the weights of the uncovered
+# elements go up. Whenever the solution is a cover it is recorded and its best scoring subset is removed.
+# the search runs until the cutoff or the target size, the improvements go to the trace as in simulated_annealing()
+# checkpoint and resume work as in simulated_annealing(), the state holds the weights instead of the temperature
+# with costs (weighted set cover, in the style of RWLS) the subsets are compared by score per unit of cost
+def weighted_local_search(universe, subsets, seed=42, cutoff=1000, backend="set", incumbent=None, stats=None, on_improve=None,
+                          initial_solution=None, checkpoint=None, resume=None, target=None, costs=None):
+    start = time.time()
+    trace_time = []
+    trace_sol = []
+    rng = random.Random(seed)
+
+    # elements are numbered 0..n-1, members[i] are the elements of subset i and index[e] the subsets covering e
+    number = {e: k for k, e in enumerate(universe)}
+    members = [[number[e] for e in subset if e in number] for subset in subsets]
+    index = [[] for _ in range(len(number))]
+    for i, elements in enumerate(members):
+        for e in elements:
+            index[e].append(i)
+
+    m = len(subsets)
+    weight = list(resume["weight"]) if resume is not None else [1] * len(number)
+    count = [0] * len(number) # number of chosen subsets covering every element
+    owner = [0] * len(number) # xor of the chosen subsets covering every element, the only one when count is 1
+    score = [sum(weight[e] for e in elements) for elements in members]
+    chosen = [False] * m
+    age = [0] * m # step of the last flip of every subset, ties go to the oldest
+    conf = [True] * m # configuration checking: the subset may be added
+    uncovered = list(range(len(number))) # uncovered elements with their positions, for O(1) updates and draws
+    position = list(range(len(number)))
+    solution = []
+    cost = costs if costs is not None else [1] * m
+    solution_cost = 0
+
+    def add(j, step):
+        nonlocal solution_cost
+        chosen[j] = True
+        score[j] = -score[j]
+        age[j] = step
+        solution.append(j)
+        solution_cost += cost[j]
+        for e in members[j]:
+            if count[e] == 0:
+                w = weight[e]
+                for k in index[e]:
+                    if k != j:
+                        score[k] -= w
+                    conf[k] = True
+                last = uncovered.pop() # drop e from the uncovered elements
+                if last != e:
+                    uncovered[position[e]] = last
+                    position[last] = position[e]
+            elif count[e] == 1:
+                score[owner[e]] += weight[e] # e is no longer only covered by its owner
+            count[e] += 1
+            owner[e] ^= j
+
+    def remove(i, step):
+        nonlocal solution_cost
+        chosen[i] = False
+        score[i] = -score[i]
+        age[i] = step
+        solution.remove(i)
+        solution_cost -= cost[i]
+        for e in members[i]:
+            count[e] -= 1
+            owner[e] ^= i
+            if count[e] == 0:
+                w = weight[e]
+                for k in index[e]:
+                    if k != i:
+                        score[k] += w
+                    conf[k] = True
+                position[e] = len(uncovered)
+                uncovered.append(e)
+            elif count[e] == 1:
+                score[owner[e]] -= weight[e] # its last owner is now the only one covering e
+        conf[i] = False
+
+    # the chosen subset with the best score (the smallest loss), skipping tabu
+    def best_to_remove(tabu):
+        best = None
+        for i in solution:
+            if i != tabu and (best is None or score[i] > score[best] or (score[i] == score[best] and age[i] < age[best])):
+                best = i
+        return best
+
+    # the same with costs: the smallest loss per unit of cost, so expensive subsets go first
+    def best_to_remove_weighted(tabu):
+        best = None
+        for i in solution:
+            if i != tabu and (best is None or score[i] * cost[best] > score[best] * cost[i]
+                              or (score[i] * cost[best] == score[best] * cost[i] and age[i] < age[best])):
+                best = i
+        return best
+
+    if costs is not None:
+        best_to_remove = best_to_remove_weighted
+
+    if resume is not None:
+        start = resume["load_start"] - resume["elapsed"] # the load of the checkpoint counts in this run
+        cutoff += resume["elapsed"]
+        rng.setstate(resume["random"])
+        for i in resume["solution"]:
+            add(i, 0)
+        age[:], conf[:] = resume["age"], resume["conf"]
+        best_solution = list(resume["best_solution"])
+        trace_time, trace_sol = list(resume["trace_time"]), list(resume["trace_sol"])
+        step = resume["step"]
+        added = resume["added"]
+    else:
+        if initial_solution is None:
+            kernel = BitsetKernel(universe, subsets) if backend == "bitset" and costs is None else None
+            initial_solution = get_initial_solution(universe, subsets, kernel, costs)
+        for i in eliminate_redundant(initial_solution, subsets, rng, costs=costs):
+            add(i, 0)
+        best_solution = solution[:]
+        trace_time.append(round(time.time() - start,4))
+        trace_sol.append(solution_cost)
+        if on_improve is not None:
+            on_improve(trace_time[-1], trace_sol[-1])
+        step = 0
+        added = None # the subset added in the last step, it is not removed in the next one
+    best_cost = sum(cost[i] for i in best_solution)
+    if incumbent is not None:
+        offer(incumbent, best_cost)
+
+    # state saved by the checkpoints
+    def checkpoint_state():
+        return {"solution": solution[:], "best_solution": best_solution[:], "weight": weight[:], "age": age[:], "conf": conf[:],
+                "step": step, "added": added, "random": rng.getstate(), "trace_time": trace_time[:], "trace_sol": trace_sol[:],
+                "elapsed": time.time() - start}
+
+    first = step
+    weight_increases = 0
+    improvements = 0
+    while time.time() - start < cutoff:
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(checkpoint_state())
+        if target is not None and best_cost <= target:
+            break
+        step += 1
+        # a cover: record it if it is the best, then remove a subset and keep searching for a smaller one
+        while not uncovered:
+            if solution_cost < best_cost:
+                best_solution = solution[:]
+                best_cost = solution_cost
+                improvements += 1
+                trace_time.append(round(time.time() - start,4))
+                trace_sol.append(best_cost)
+                if on_improve is not None:
+                    on_improve(trace_time[-1], trace_sol[-1])
+                if incumbent is not None:
+                    offer(incumbent, best_cost)
+            if len(solution) <= (1 if costs is None else 0): # with costs, a cheaper cover may still use other subsets
+                break
+            remove(best_to_remove(None), step)
+            added = None
+        if not uncovered: # one subset covers everything, it is optimal
+            break
+
+        # swap: remove the best subset, then add the best subset covering a random uncovered element
+        to_remove = best_to_remove(added)
+        if to_remove is not None:
+            remove(to_remove, step)
+        e = uncovered[rng.randrange(len(uncovered))]
+        best = None
+        if costs is None:
+            for k in index[e]:
+                if conf[k] and k != to_remove and (best is None or score[k] > score[best] or (score[k] == score[best] and age[k] < age[best])):
+                    best = k
+        else:
+            for k in index[e]:
+                if conf[k] and k != to_remove and (best is None or score[k] * cost[best] > score[best] * cost[k]
+                                                   or (score[k] * cost[best] == score[best] * cost[k] and age[k] < age[best])):
+                    best = k
+        if best is None: # every candidate is blocked, fall back to the oldest one
+            best = min(index[e], key=lambda k: age[k])
+        add(best, step)
+        added = best
+
+        # raise the weight of the elements that are still uncovered
+        for e in uncovered:
+            weight[e] += 1
+            for k in index[e]:
+                score[k] += 1
+        weight_increases += len(uncovered)
+
+    if checkpoint is not None:
+        checkpoint.save(checkpoint_state())
+    if stats is not None:
+        stats["iterations"] = step - first
+        stats["weight_increases"] = weight_increases
+        stats["improvements"] = improvements
+    final_time = trace_time[-1]
+    return best_solution,trace_time,trace_sol,final_time
@@ -3,15 +3,39 @@
 # return best solution
 
 import time
-def greedy_set_cover(U, subsets):
+import heapq
+from bitset import BitsetKernel
+
+# the engines that greedy_set_cover() can run with
+ENGINES = ["scan", "lazy", "bitset"]
+
+def greedy_set_cover(U, subsets, engine="scan", index=None, stats=None, costs=None):
     """
     Parameters:
     - n: number of elements in the universe
     - subsets: list of sets (each is a set of integers representing items)
+    - engine: "scan" rescans every subset on each pass, "lazy" uses greedy_set_cover_lazy(),
+      "bitset" scores every subset at once with the numpy kernel in bitset.py
+    - index: element -> indices of the subsets containing it, used by the lazy engine (built if not given)
+    - stats: if given, filled with the number of picks and of gain evaluations
+    - costs: cost of every subset, every engine then runs greedy_set_cover_weighted()
 
     Returns:
     - chosen_subsets: indices of subsets chosen (1-indexed)
     """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown greedy engine: {engine}")
+    if costs is not None:
+        return greedy_set_cover_weighted(U, subsets, costs, index, stats)
+    if engine == "lazy":
+        return greedy_set_cover_lazy(U, subsets, index, stats)
+    if engine == "bitset":
+        chosen_subsets = [idx + 1 for idx in BitsetKernel(U, subsets).greedy()]  # convert to 1-indexed
+        if stats is not None:
+            stats["picks"] = len(chosen_subsets)
+            stats["evaluations"] = len(chosen_subsets) * len(subsets) # every pick scores all subsets at once
+        return chosen_subsets
+
     # U = set(range(1, n + 1))  # universe to cover
     covered = set()
     chosen_subsets = []
@@ -34,5 +58,90 @@ def greedy_set_cover(U, subsets):
         covered |= best_subset
         chosen_subsets.append(best_index + 1)  # convert to 1-indexed
 
+    if stats is not None:
+        stats["picks"] = len(chosen_subsets)
+        stats["evaluations"] = len(chosen_subsets) * len(subsets)
     return chosen_subsets
 
+# build the inverted index: element -> indices of the subsets that contain it
+def build_element_index(subsets):
+    index = {}
+    for idx, subset in enumerate(subsets):
+        for e in subset:
+            index.setdefault(e, []).append(idx)
+    return index
+
+# lazy greedy loop shared by the greedy engines here and the randomized greedy of hill.py: the subset with the
+# smallest score(idx, gain) is picked, gain being its number of uncovered elements. Gains only go down as elements get
+# covered, so with a score that never goes down with the gain a stale score is a lower bound, and a subset only has
+# to be re-scored when it reaches the top of the heap
+# tie() gives the tie-break of every subset (e.g. rng.random), the smallest index wins ties without it
+# chosen (indices) are picked first, the stats dict is filled with the number of picks and of heap pops
+# return the solution indices (0-indexed) in pick order
+def lazy_greedy(U, subsets, index, score, tie=None, chosen=(), stats=None):
+    gain = [len(subset) for subset in subsets] # exact number of uncovered elements in every subset
+    covered = set()
+    uncovered = len(U)
+    solution = []
+    heap = None
+    evaluations = 0
+    while True:
+        # cover the new elements of the chosen subsets, only the subsets sharing them need their gain updated
+        for idx in chosen:
+            for e in subsets[idx]:
+                if e not in covered:
+                    covered.add(e)
+                    if e in U:
+                        uncovered -= 1
+                    for other in index[e]:
+                        gain[other] -= 1
+            solution.append(idx)
+        if uncovered <= 0:
+            break
+        if heap is None:
+            heap = [(score(idx, g), tie() if tie is not None else idx, idx) for idx, g in enumerate(gain) if g > 0]
+            heapq.heapify(heap)
+        # pop until the entry on top is up to date, pushing stale entries back with their real score
+        while heap:
+            key, rank, idx = heapq.heappop(heap)
+            evaluations += 1
+            if gain[idx] > 0:
+                fresh = score(idx, gain[idx])
+                if key == fresh:
+                    break
+                heapq.heappush(heap, (fresh, rank, idx))
+        else:
+            raise ValueError("Cannot cover all elements in the universe.")
+        chosen = [idx]
+
+    if stats is not None:
+        stats["picks"] = len(solution)
+        stats["evaluations"] = evaluations # heap pops, a stale entry is pushed back and counted again
+    return solution
+
+# lazy greedy (CELF style): gains only go down as elements get covered, so a stale gain
+# is an upper bound and a subset only has to be re-checked when it reaches the top of the heap
+def greedy_set_cover_lazy(U, subsets, index=None, stats=None):
+    """
+    Same cover and the same tie-breaking (smallest index among the largest gains) as the scan engine.
+
+    Returns:
+    - chosen_subsets: indices of subsets chosen (1-indexed)
+    """
+    if index is None:
+        index = build_element_index(subsets)
+    return [idx + 1 for idx in lazy_greedy(U, subsets, index, lambda idx, g: -g, stats=stats)]  # convert to 1-indexed
+
+# weighted greedy: pick the subset with the smallest cost per newly covered element
+# the same lazy heap as greedy_set_cover_lazy(): a ratio only goes up as elements get covered, so a stale ratio
+# is a lower bound and a subset only has to be re-checked when it reaches the top of the heap
+def greedy_set_cover_weighted(U, subsets, costs, index=None, stats=None):
+    """
+    Ties go to the smallest index. With unit costs it picks the same cover as the other engines.
+
+    Returns:
+    - chosen_subsets: indices of subsets chosen (1-indexed)
+    """
+    if index is None:
+        index = build_element_index(subsets)
+    return [idx + 1 for idx in lazy_greedy(U, subsets, index, lambda idx, g: costs[idx] / g, stats=stats)]  # convert to 1-indexed
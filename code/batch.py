@@ -0,0 +1,148 @@
+# This file implements the batch mode: every algorithm with every seed on every instance of a directory
+# the jobs run on a pool of worker processes, jobs that already have their output are skipped (so a crashed
+# batch is resumed by running it again) and one summary of all jobs is written as CSV and JSON
+#
+# python batch.py -dir <instance directory> -algs hill,annealing,Approx,BnB -time <cutoff> -seed <first seed> -seeds <N> -jobs <processes>
+
+import argparse
+import csv
+import json
+import os
+import sys
+import multiprocessing
+from script import ALGORITHMS, add_solver_arguments, load_instance, solve, solve_profiled, output_paths, extra_paths, write_output, write_stats, read_optimal, cover_cost
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-dir',required = True,help='Directory of the instances')
+    parser.add_argument('-ext',default='.in',help='Extension of the instance files')
+    parser.add_argument('-algs',default=','.join(ALGORITHMS),help='Comma separated algorithms')
+    parser.add_argument('-time',type = float,required=True,help='Cutoff in seconds of every job')
+    parser.add_argument('-seed',type = int,default=1,help='First random seed')
+    parser.add_argument('-seeds',type = int,default=1,help='Number of seeds for hill and annealing')
+    parser.add_argument('-jobs',type = int,default=os.cpu_count(),help='Number of jobs running at the same time')
+    parser.add_argument('-out',default='../output',help='Output directory, the files go to <out>/<alg>/')
+    parser.add_argument('-optdir',help='Directory of the optimal values <instance>.out, defaults to -dir')
+    parser.add_argument('-summary',default='summary',help='Summary file name, written as <out>/<summary>.csv and .json')
+    add_solver_arguments(parser)
+
+    args = parser.parse_args()
+    for algo in args.algs.split(','):
+        if algo not in ALGORITHMS:
+            parser.error(f"unknown algorithm in -algs: {algo}")
+    return args
+
+# every (instance, algorithm, seed) job, grouped by instance
+# Approx and BnB do not use the seed, they run once per instance
+def list_jobs(args):
+    instances = sorted(os.path.join(args.dir, name) for name in os.listdir(args.dir) if name.endswith(args.ext))
+    jobs = []
+    for filename in instances:
+        for algo in args.algs.split(','):
+            if algo == "hill" or algo == "annealing":
+                jobs += [(filename, algo, seed) for seed in range(args.seed, args.seed + args.seeds)]
+            else:
+                jobs.append((filename, algo, None))
+    return jobs
+
+# the result record of a job is written last, so a job is done when it exists
+def result_path(args, job):
+    filename, algo, seed = job
+    sol_filename, _ = output_paths(algo, filename, args.time, seed, args.out)
+    return os.path.splitext(sol_filename)[0] + '.json'
+
+# state of a batch worker process: the arguments and the last instance it loaded
+# jobs are handed out in instance order, so every worker loads every instance at most once
+_worker = {"filename": None, "instance": None}
+
+def init_batch_worker(args):
+    _worker["args"] = args
+
+def run_job(job):
+    filename, algo, seed = job
+    args = _worker["args"]
+    try:
+        if _worker["filename"] != filename:
+            _worker["instance"] = None # free the previous instance before loading the next one
+            _worker["instance"] = load_instance(filename, args.algs.split(','), args.reduce, args.cache)
+            _worker["filename"] = filename
+        if args.profile:
+            profile_filename = extra_paths(algo, filename, args.time, seed, args.out)[1]
+            best_cover, trace, runtime, stats = solve_profiled(profile_filename, algo, _worker["instance"], args.time, seed, args)
+        else:
+            best_cover, trace, runtime, stats = solve(algo, _worker["instance"], args.time, seed, args)
+    except ValueError as e:
+        return job, str(e)
+
+    costs = _worker["instance"]["costs"]
+    write_output(algo, filename, args.time, seed, best_cover, trace, args.out, stats.get("lower_bound"), costs)
+    if args.stats:
+        write_stats(algo, filename, args.time, seed, best_cover, runtime, stats, args.out, costs)
+    record = {"instance": os.path.splitext(os.path.basename(filename))[0], "algorithm": algo, "seed": seed,
+              "cutoff": args.time, "size": len(best_cover), "runtime": runtime, "lower_bound": stats.get("lower_bound"),
+              "cost": cover_cost(best_cover, costs) if costs is not None else None}
+    with open(result_path(args, job), 'w') as f:
+        json.dump(record, f)
+    return job, None
+
+# optimal value of an instance, None if its <instance>.out file does not exist
+def optimal_value(args, instance_name):
+    path = os.path.join(args.optdir or args.dir, instance_name + '.out')
+    return read_optimal(path) if os.path.exists(path) else None
+
+# one row per finished job with the relative error against the optimal value (and the lower bound with -lowerbound)
+# the error of a weighted instance compares the cost of the cover with the optimal cost
+def write_summary(args, jobs):
+    rows = []
+    optimal = {}
+    for job in jobs:
+        path = result_path(args, job)
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            row = json.load(f)
+        name = row["instance"]
+        if name not in optimal:
+            optimal[name] = optimal_value(args, name)
+        row["optimal"] = optimal[name]
+        row.setdefault("lower_bound", None) # results of older runs
+        row.setdefault("cost", None)
+        quality = row["size"] if row["cost"] is None else row["cost"]
+        row["rel_error"] = (quality - optimal[name]) / optimal[name] if optimal[name] else None
+        rows.append(row)
+
+    fields = ["instance", "algorithm", "seed", "cutoff", "size", "cost", "runtime", "optimal", "rel_error", "lower_bound"]
+    with open(os.path.join(args.out, args.summary + '.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(args.out, args.summary + '.json'), 'w') as f:
+        json.dump(rows, f, indent=1)
+    return rows
+
+def main():
+    args = parse_args()
+    jobs = list_jobs(args)
+    for algo in args.algs.split(','):
+        os.makedirs(os.path.join(args.out, algo), exist_ok=True)
+
+    todo = [job for job in jobs if not os.path.exists(result_path(args, job))]
+    print(f"{len(jobs)} jobs, {len(jobs) - len(todo)} already done")
+    failed = 0
+    if todo:
+        with multiprocessing.Pool(min(args.jobs, len(todo)), initializer=init_batch_worker, initargs=(args,)) as pool:
+            for done, (job, error) in enumerate(pool.imap_unordered(run_job, todo), 1):
+                filename, algo, seed = job
+                name = f"{os.path.basename(filename)} {algo}" + (f" seed {seed}" if seed is not None else "")
+                if error is not None:
+                    failed += 1
+                    print(f"[{done}/{len(todo)}] {name}: Error: {error}", file=sys.stderr)
+                else:
+                    print(f"[{done}/{len(todo)}] {name}")
+
+    rows = write_summary(args, jobs)
+    print(f"{len(rows)} results written to {os.path.join(args.out, args.summary)}.csv/.json" + (f", {failed} failed" if failed else ""))
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,115 @@
+# This file implements the benchmark suite of the four algorithms
+# every algorithm runs on a fixed matrix of generated instances (see generate.py), the results can be saved
+# as a baseline and later runs are compared against it to flag throughput and quality regressions
+#
+# python bench.py -time <cutoff> [-save baseline.json] [-compare baseline.json -threshold 0.2]
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import contextlib
+from generate import generate, write_instance
+from script import ALGORITHMS, add_solver_arguments, load_instance, solve
+
+# (kind, n, m, density, seed) of the benchmark instances, changing it invalidates the saved baselines
+MATRIX = [
+    ("random", 200, 300, 0.05, 1),
+    ("powerlaw", 500, 800, 0.02, 2),
+    ("planted", 300, 400, 0.05, 3),
+    ("orlib", 200, 1000, 0.02, 4),
+]
+
+def case_name(case):
+    kind, n, m, density, seed = case
+    return f"{kind}_n{n}_m{m}_d{density}_s{seed}"
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-algs',default=','.join(ALGORITHMS),help='Comma separated algorithms')
+    parser.add_argument('-time',type = float,default=5,help='Cutoff in seconds of every run')
+    parser.add_argument('-seed',type = int,default=1,help='Random seed of hill and annealing')
+    parser.add_argument('-repeat',type = int,default=1,help='Runs of every algorithm, the best one is kept to reduce timing noise (most nodes/s for BnB, shortest runtime for the others)')
+    parser.add_argument('-save',help='Save the results as a baseline to this file')
+    parser.add_argument('-compare',help='Compare the results with the baseline in this file')
+    parser.add_argument('-threshold',type = float,default=0.2,help='Relative slowdown flagged as a throughput regression')
+    parser.add_argument('-quality',type = float,default=0.0,help='Relative increase of the cover size flagged as a quality regression')
+    add_solver_arguments(parser)
+    return parser.parse_args()
+
+# run every algorithm on every instance of the matrix
+# return {case: {algorithm: {"runtime", "size", and "nodes_per_sec" for BnB}}}
+def run_matrix(args):
+    algos = args.algs.split(',')
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for case in MATRIX:
+            name = case_name(case)
+            universe, subsets, _ = generate(*case)
+            filename = os.path.join(tmp, name + '.in')
+            write_instance(filename, universe, subsets)
+            instance = load_instance(filename, algos, args.reduce, args.cache)
+            results[name] = {}
+            for algo in algos:
+                seed = args.seed if algo == "hill" or algo == "annealing" else None
+                result = None
+                for _ in range(args.repeat):
+                    with contextlib.redirect_stdout(sys.stderr): # keep the algorithms' own prints out of the table
+                        best_cover, _, runtime, stats = solve(algo, instance, args.time, seed, args)
+                    run = {"runtime": runtime, "size": len(best_cover)}
+                    if algo == "BnB":
+                        run["nodes_per_sec"] = stats["expanded"] / max(runtime, 1e-9)
+                    # keep the best run by the metric compare() checks: throughput for BnB, runtime for the others
+                    if result is None or (run["nodes_per_sec"] > result["nodes_per_sec"] if algo == "BnB" else run["runtime"] < result["runtime"]):
+                        result = run
+                runtime = result["runtime"]
+                results[name][algo] = result
+                print(f"{name:32} {algo:10} size {result['size']:6} runtime {runtime:8.3f}s"
+                      + (f" {result['nodes_per_sec']:10.0f} nodes/s" if algo == "BnB" else ""))
+    return results
+
+# compare the results with a baseline
+# return the list of regressions as messages
+def compare(results, baseline, threshold, quality):
+    regressions = []
+    for name, algos in results.items():
+        for algo, result in algos.items():
+            base = baseline.get(name, {}).get(algo)
+            if base is None:
+                continue
+            if result["size"] > base["size"] * (1 + quality):
+                regressions.append(f"{name} {algo}: cover size {result['size']} (baseline {base['size']})")
+            if algo == "BnB":
+                # BnB runs until the cutoff, its throughput is the number of nodes per second
+                if result["nodes_per_sec"] * (1 + threshold) < base["nodes_per_sec"]:
+                    regressions.append(f"{name} {algo}: {result['nodes_per_sec']:.0f} nodes/s (baseline {base['nodes_per_sec']:.0f})")
+            elif base["runtime"] >= 0.05 and result["runtime"] > base["runtime"] * (1 + threshold): # shorter runs are mostly noise
+                regressions.append(f"{name} {algo}: runtime {result['runtime']:.3f}s (baseline {base['runtime']:.3f}s)")
+    return regressions
+
+def main():
+    args = parse_args()
+    results = run_matrix(args)
+    report = {"time": args.time, "seed": args.seed, "results": results}
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f"baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["time"] != args.time or baseline["seed"] != args.seed:
+            print("Warning: the baseline was run with another -time or -seed", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.threshold, args.quality)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("no regression against the baseline")
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,99 @@
+# This file implements the packed-bitset coverage kernel shared by approx.py, hill.py and SA.py
+# every subset is one row of a uint64 matrix (subsets x ceil(n/64) words), so the gain of every
+# subset against the uncovered elements is a single vectorized AND + popcount
+# it needs numpy, the set-based code paths keep working without it. numpy is only imported when the first kernel is
+# built, so the runs that never use the kernel do not pay for the import
+
+np = None
+_BYTE_COUNTS = None
+
+# import numpy the first time it is needed, return it (None if it is not installed)
+def _numpy():
+    global np, _BYTE_COUNTS
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+        _BYTE_COUNTS = np.array([bin(b).count('1') for b in range(256)], dtype=np.uint8)
+    return np
+
+# popcount of every uint64 word, np.bitwise_count only exists from numpy 2.0
+def popcount(words):
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    return _BYTE_COUNTS[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1)
+
+class BitsetKernel:
+    """
+    Parameters:
+    - universe: set of elements to cover
+    - subsets: list of sets of elements, elements outside the universe are ignored
+
+    Masks are uint64 arrays of ceil(n/64) words, bit k stands for the k-th smallest element of the universe.
+    """
+
+    def __init__(self, universe, subsets):
+        if _numpy() is None:
+            raise ImportError("The bitset backend needs numpy.")
+        position = {e: k for k, e in enumerate(sorted(universe))}
+        self.n = len(position)
+        self.m = len(subsets)
+        self.words = max(1, (self.n + 63) // 64)
+
+        # collect (row, bit) pairs of the whole instance and set them in one call
+        rows = []
+        bits = []
+        for idx, subset in enumerate(subsets):
+            positions = [position[e] for e in subset if e in position]
+            rows.extend([idx] * len(positions))
+            bits.extend(positions)
+        rows = np.array(rows, dtype=np.int64)
+        bits = np.array(bits, dtype=np.int64)
+        self.matrix = np.zeros((self.m, self.words), dtype=np.uint64)
+        np.bitwise_or.at(self.matrix, (rows, bits >> 6), np.left_shift(np.uint64(1), (bits & 63).astype(np.uint64)))
+
+        self.full = np.zeros(self.words, dtype=np.uint64) # mask of the whole universe
+        full_words, rest = divmod(self.n, 64)
+        self.full[:full_words] = np.uint64(0xFFFFFFFFFFFFFFFF)
+        if rest:
+            self.full[full_words] = np.uint64((1 << rest) - 1)
+
+    # number of elements of the mask
+    def size(self, mask):
+        return int(popcount(mask).sum())
+
+    # number of elements of the mask covered by every subset, in one vectorized pass
+    def gains(self, mask):
+        return popcount(self.matrix & mask).sum(axis=1, dtype=np.int64)
+
+    # mask of the elements covered by the subsets in rows (0-indexed)
+    def union(self, rows):
+        rows = list(rows)
+        if not rows:
+            return np.zeros(self.words, dtype=np.uint64)
+        return np.bitwise_or.reduce(self.matrix[rows], axis=0)
+
+    # check if the subsets in rows (0-indexed) cover the whole universe
+    def is_cover(self, rows):
+        return bool(np.array_equal(self.union(rows), self.full))
+
+    # greedy cover of the mask, picks the largest gain and the smallest index on ties
+    # (a random one of the largest gains if a random.Random is given)
+    # return the chosen indices (0-indexed)
+    def greedy(self, uncovered=None, excluded=(), rng=None):
+        uncovered = self.full.copy() if uncovered is None else uncovered.copy()
+        chosen = []
+        while uncovered.any():
+            gains = self.gains(uncovered)
+            gains[list(excluded)] = -1
+            best = int(np.argmax(gains))
+            if gains[best] <= 0:
+                raise ValueError("Cannot cover all elements in the universe.")
+            if rng is not None:
+                ties = np.flatnonzero(gains == gains[best])
+                best = int(ties[rng.randrange(len(ties))])
+            chosen.append(best)
+            uncovered &= ~self.matrix[best]
+        return chosen
@@ -0,0 +1,136 @@
+# This file implements the lower bounds on the size of any cover, used to tell how far a cover is from optimal
+# lower_bounds() runs all of them and keeps the best, script.py writes the gap to the optimum bound in the trace and
+# stops the algorithms once the gap is small enough
+#
+# - size: uncovered elements divided by the largest subset (the size bound of BnB at the root)
+# - packing: elements no two of which share a subset, each one needs its own subset
+# - dual: LP dual where every element weighs 1 / (size of the largest subset covering it)
+# - lagrangian: subgradient optimization of the Lagrangian relaxation, started from the dual weights (needs numpy)
+# with costs (weighted set cover) they bound the cost of any cover: size and dual use the smallest cost per element,
+# packing sums the cheapest subset covering every packed element. Bounds of integer costs are rounded up
+
+import math
+import time
+
+np = None # imported by _numpy() when the Lagrangian bound first runs, the other bounds do not need it
+
+# import numpy the first time it is needed, return it (None if it is not installed)
+def _numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+# the sets of the BnB (bitmask, size, idx) tuples, elements 1..n
+def sets_from_bitmasks(n, subsets):
+    from BnB import bit_positions
+    return set(range(1, n + 1)), [set(e + 1 for e in bit_positions(bitmask)) for bitmask, _, _ in subsets]
+
+def size_bound(universe, subsets, costs=None):
+    if costs is not None:
+        return len(universe) * min((cost / len(subset) for subset, cost in zip(subsets, costs) if subset), default=0)
+    largest = max((len(subset) for subset in subsets), default=0)
+    return math.ceil(len(universe) / largest) if largest else 0
+
+# greedy packing: rare elements first, an element is packed if none of its subsets covers a packed element
+# with costs, every packed element adds the cost of the cheapest subset covering it
+def packing_bound(universe, index, costs=None):
+    used = set()
+    packed = 0
+    for e in sorted(universe, key=lambda e: len(index[e])):
+        if used.isdisjoint(index[e]):
+            used.update(index[e])
+            packed += 1 if costs is None else min(costs[i] for i in index[e])
+    return packed
+
+# dual weights 1 / (size of the largest subset covering the element): every subset weighs at most 1 in total,
+# so the sum of the weights is a lower bound. With costs, the smallest cost per element of the subsets covering it,
+# every subset then weighs at most its cost
+def dual_weights(universe, subsets, index, costs=None):
+    if costs is not None:
+        return {e: min(costs[i] / len(subsets[i]) for i in index[e]) for e in universe}
+    return {e: 1.0 / max(len(subsets[i]) for i in index[e]) for e in universe}
+
+# Lagrangian relaxation of min sum c_j x_j subject to (sum over the subsets j covering e of x_j) >= 1 for every element e:
+# L(u) = sum of u_e + sum over the subsets of min(0, c_j - sum of u_e over its elements) is a lower bound for any u >= 0.
+# c_j is 1 without costs. u is improved by subgradient steps (Held and Karp step size towards the upper bound) until time_limit
+# return the best L(u) found
+def lagrangian_bound(universe, subsets, weights, upper, time_limit=1.0, iterations=300, costs=None):
+    start = time.time()
+    number = {e: k for k, e in enumerate(universe)}
+    rows = [[number[e] for e in subset if e in number] for subset in subsets]
+    if costs is None:
+        cost = 1.0
+    else:
+        cost = np.array([c for c, row in zip(costs, rows) if row], dtype=float)
+    rows = [row for row in rows if row] # empty subsets never help
+    ptr = np.cumsum([0] + [len(row) for row in rows])
+    cols = np.fromiter((e for row in rows for e in row), dtype=np.int64, count=int(ptr[-1]))
+    row_of = np.repeat(np.arange(len(rows)), np.diff(ptr))
+    u = np.zeros(len(number))
+    for e, w in weights.items():
+        u[number[e]] = w
+
+    best = 0.0
+    step = 2.0 # Held and Karp factor, halved when the bound stops improving
+    stale = 0
+    for _ in range(iterations):
+        if time.time() - start > time_limit:
+            break
+        reduced = cost - np.add.reduceat(u[cols], ptr[:-1]) # reduced cost of every subset
+        value = u.sum() + np.minimum(reduced, 0.0).sum()
+        if value > best + 1e-9:
+            best = value
+            stale = 0
+        else:
+            stale += 1
+            if stale >= 10:
+                step /= 2
+                stale = 0
+                if step < 1e-4:
+                    break
+        chosen = reduced < 0 # the subsets minimizing L(u)
+        gradient = 1.0 - np.bincount(cols[chosen[row_of]], minlength=len(number))
+        gradient[(u <= 0) & (gradient < 0)] = 0 # u cannot go below 0
+        norm = float(gradient @ gradient)
+        if norm == 0: # u is optimal
+            break
+        u = np.maximum(u + step * (upper - value) / norm * gradient, 0.0)
+    return best
+
+# every lower bound of the instance, upper is the size (cost with costs) of a known cover (it guides the subgradient steps)
+# return a dict with the bound of every method, the best one and the time it took
+def lower_bounds(universe, subsets, upper, time_limit=1.0, costs=None):
+    start = time.time()
+    if not universe:
+        return {"size": 0, "packing": 0, "dual": 0, "best": 0, "time": 0.0}
+    index = {e: [] for e in universe}
+    for i, subset in enumerate(subsets):
+        for e in subset:
+            if e in index:
+                index[e].append(i)
+    integral = costs is None or all(isinstance(cost, int) for cost in costs)
+    def round_up(value, eps=1e-9):
+        return math.ceil(value - eps) if integral else value
+
+    weights = dual_weights(universe, subsets, index, costs)
+    bounds = {"size": round_up(size_bound(universe, subsets, costs)), "packing": packing_bound(universe, index, costs),
+              "dual": round_up(sum(weights.values()))}
+    if _numpy() is not None:
+        bounds["lagrangian"] = round_up(lagrangian_bound(universe, subsets, weights, upper, time_limit, costs=costs), 1e-6)
+    bounds["best"] = max(bounds.values())
+    bounds["time"] = time.time() - start
+    return bounds
+
+# the largest cover size whose relative gap (size - bound) / size is at most tolerance
+# a bound that is not an integer (non-integer costs) gives a target that is not rounded either
+def target_size(bound, tolerance):
+    if tolerance >= 1:
+        return math.inf
+    if isinstance(bound, float):
+        return bound / (1 - tolerance) + 1e-9
+    return math.floor(bound / (1 - tolerance) + 1e-9)
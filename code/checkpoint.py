@@ -0,0 +1,74 @@
+# This file implements the checkpoints of long runs, so a run cut by its cutoff can be resumed by the next one
+# the algorithms save their search state through a Checkpoint every interval seconds and once more when they stop,
+# a later run reads it with load_checkpoint() and gives the state to the algorithm as its resume parameter
+#
+# a checkpoint file is MAGIC, the seconds its save took (a double), then the zlib-compressed pickle of
+# {"header": ..., "state": ...}
+# the header identifies the run (algorithm, instance checksum, options) so a state is never resumed on another
+# instance, the state is the dict built by the algorithm (see branch_and_bound(), simulated_annealing(),
+# weighted_local_search() and hill_climbing())
+
+import os
+import pickle
+import struct
+import time
+import zlib
+
+MAGIC = b"SCCKPT2\n"
+DURATION = struct.Struct("<d")
+
+class Checkpoint:
+    """
+    - path: file the state is written to, it is replaced atomically
+    - header: dict identifying the run, checked by load_checkpoint()
+    - interval: seconds between two periodic saves
+    """
+
+    def __init__(self, path, header, interval=60):
+        self.path = path
+        self.header = header
+        self.interval = interval
+        self.next = time.time() + interval
+        self.saves = 0
+        self.duration = 0.0 # seconds the last save took, a search can stop that much before its cutoff to save in time
+
+    # true when the next periodic save is due, cheap enough to be called on every iteration
+    def due(self):
+        return time.time() >= self.next
+
+    # the bytes written for a state, the fastest compression level: the states of wide searches are large and the save
+    # is paid on every slice. A search can time it on a sample of its state to know how long a save will take
+    def encode(self, state):
+        return zlib.compress(pickle.dumps({"header": self.header, "state": state}, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+    # start is when the algorithm started building state (now by default), it counts in the duration of the save
+    def save(self, state, start=None):
+        if start is None:
+            start = time.time()
+        data = self.encode(state)
+        self.duration = time.time() - start
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(DURATION.pack(self.duration))
+            f.write(data)
+        os.replace(tmp_path, self.path)
+        self.saves += 1
+        self.next = time.time() + self.interval
+
+# read the state of a checkpoint, its header must be equal to the given one
+# the seconds its save took are added to the state as "save_time", and the time the load started as "load_start":
+# a resumed run counts its time from there, so reading and restoring the state is part of its cutoff
+def load_checkpoint(path, header):
+    load_start = time.time()
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint.")
+        duration, = DURATION.unpack(f.read(DURATION.size))
+        content = pickle.loads(zlib.decompress(f.read()))
+    for key, value in header.items():
+        if content["header"].get(key) != value:
+            raise ValueError(f"{path} was saved with {key} = {content['header'].get(key)!r}, this run has {value!r}.")
+    content["state"]["save_time"] = duration
+    content["state"]["load_start"] = load_start
+    return content["state"]
@@ -0,0 +1,112 @@
+# This file implements the incremental coverage state used by the local search algorithms
+# CoverageState keeps how many chosen subsets cover every element, so feasibility of a move
+# is checked on the subsets it touches instead of rebuilding the union of the whole solution
+# the cost of the solution is kept up to date the same way, every move adds or subtracts the cost of its subsets
+
+import random
+
+class CoverageState:
+    """
+    Parameters:
+    - universe: set of elements to cover
+    - subsets: list of sets, every element of a subset must belong to the universe
+    - solution: indices (0-indexed) of the subsets chosen at the start
+    - costs: cost of every subset, None for unit costs (cost is then the size of the solution)
+
+    Moves (add, remove, swap) are logged until commit(), undo() reverts every move since the last commit().
+    """
+
+    def __init__(self, universe, subsets, solution=(), costs=None):
+        self.universe = universe
+        self.subsets = subsets
+        self.costs = costs if costs is not None else [1] * len(subsets)
+        self.cost = 0 # total cost of the chosen subsets
+        self.count = dict.fromkeys(universe, 0) # number of chosen subsets covering every element
+        self.uncovered = len(universe) # number of elements with a count of 0
+        self.solution = [] # indices of the chosen subsets, in no particular order
+        self.outside = list(range(len(subsets))) # indices of the subsets not chosen
+        self.position = list(range(len(subsets))) # position of every index inside solution or outside
+        self.chosen = [False] * len(subsets)
+        self.log = []
+        self.checks = 0 # number of feasibility checks (can_remove and can_swap calls)
+        for i in solution:
+            self.add(i)
+        self.commit()
+
+    # move index i from one pool (solution or outside) to the other in O(1)
+    def _move(self, i, source, target):
+        pos = self.position[i]
+        last = source.pop()
+        if last != i:
+            source[pos] = last
+            self.position[last] = pos
+        self.position[i] = len(target)
+        target.append(i)
+
+    def is_cover(self):
+        return self.uncovered == 0
+
+    # subset i can be removed if every element it covers is covered by another chosen subset
+    def can_remove(self, i):
+        self.checks += 1
+        count = self.count
+        return all(count[e] > 1 for e in self.subsets[i])
+
+    # swapping chosen subset i for subset j keeps the cover if j covers what only i covers
+    def can_swap(self, i, j):
+        self.checks += 1
+        count = self.count
+        added = self.subsets[j]
+        return all(count[e] > 1 or e in added for e in self.subsets[i])
+
+    def add(self, j):
+        count = self.count
+        for e in self.subsets[j]:
+            if count[e] == 0:
+                self.uncovered -= 1
+            count[e] += 1
+        self._move(j, self.outside, self.solution)
+        self.chosen[j] = True
+        self.cost += self.costs[j]
+        self.log.append((True, j))
+
+    def remove(self, i):
+        count = self.count
+        for e in self.subsets[i]:
+            count[e] -= 1
+            if count[e] == 0:
+                self.uncovered += 1
+        self._move(i, self.solution, self.outside)
+        self.chosen[i] = False
+        self.cost -= self.costs[i]
+        self.log.append((False, i))
+
+    def swap(self, i, j):
+        self.remove(i)
+        self.add(j)
+
+    # keep the moves made since the last commit
+    def commit(self):
+        self.log.clear()
+
+    # revert the moves made since the last commit
+    def undo(self):
+        log = self.log
+        while log:
+            added, i = log.pop()
+            if added:
+                self.remove(i)
+            else:
+                self.add(i)
+            log.pop() # the reverting move logs itself, drop it
+
+    # yield the indices of a pool (self.solution or self.outside) in random order
+    # it is a lazy Fisher-Yates shuffle so every draw is O(1), the pool must not change while iterating
+    def shuffled(self, pool):
+        position = self.position
+        for t in range(len(pool)):
+            r = random.randrange(t, len(pool))
+            a, b = pool[t], pool[r]
+            pool[t], pool[r] = b, a
+            position[a], position[b] = r, t
+            yield b
@@ -0,0 +1,124 @@
+# This file implements the seeded generator of set cover instances used by bench.py
+# generate() returns the universe and the subsets, write_instance() saves them in the input format of script.py
+#
+# python generate.py -kind [random|powerlaw|planted|orlib] -n <elements> -m <subsets> -density <d> -seed <seed> -out <filename> [-costs <max cost>]
+#
+# - random: every element is in every subset with probability density
+# - powerlaw: subset sizes follow a power law (a few very large subsets, many small ones) with mean density*n
+# - planted: k = ceil(1/density) subsets partition the universe, the other subsets are random and smaller,
+#   so the optimum is at most k
+# - orlib: shaped like the OR-library scp instances, every element is in at least 2 subsets, every subset
+#   has at least 1 element and a fraction density of the n*m pairs are set
+#
+# with -costs, every subset gets a random integer cost in 1..max cost and the instance is written in the weighted format
+
+import argparse
+import math
+import random
+
+KINDS = ["random", "powerlaw", "planted", "orlib"]
+
+# add every element that is in no subset to a random subset
+def _cover_missing(rng, universe, subsets):
+    covered = set().union(*subsets) if subsets else set()
+    for e in sorted(universe - covered):
+        rng.choice(subsets).add(e)
+
+def generate(kind, n, m, density, seed):
+    """
+    Returns:
+    - universe: set(range(1, n+1))
+    - subsets: list of m sets, every element is in at least one of them
+    - planted: the size of the planted cover (an upper bound on the optimum) for kind "planted", else None
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown instance kind: {kind}")
+    if n < 1 or m < 1:
+        raise ValueError("An instance needs at least one element and one subset.")
+    rng = random.Random(seed)
+    universe = set(range(1, n + 1))
+    elements = list(universe)
+    planted = None
+
+    if kind == "random":
+        # the size is binomial(n, density), drawn from its normal approximation
+        deviation = math.sqrt(n * density * (1 - density))
+        subsets = []
+        for _ in range(m):
+            size = min(n, max(1, round(rng.gauss(n * density, deviation))))
+            subsets.append(set(rng.sample(elements, size)))
+
+    elif kind == "powerlaw":
+        # Pareto sizes with exponent 2 have mean 2 * minimum, scaled so the mean is density * n
+        minimum = max(1.0, density * n / 2)
+        subsets = []
+        for _ in range(m):
+            size = min(n, max(1, int(minimum * rng.paretovariate(2.0))))
+            subsets.append(set(rng.sample(elements, size)))
+
+    elif kind == "planted":
+        k = min(m, n, max(1, math.ceil(1 / density)))
+        shuffled = elements[:]
+        rng.shuffle(shuffled)
+        subsets = [set(shuffled[i::k]) for i in range(k)] # the planted cover, k disjoint blocks
+        block = n // k
+        for _ in range(m - k):
+            size = max(1, rng.randint(block // 4, max(1, block - 1))) # smaller than a block
+            subsets.append(set(rng.sample(elements, size)))
+        rng.shuffle(subsets)
+        planted = k
+
+    else:
+        subsets = [set() for _ in range(m)]
+        for e in elements: # every element in at least 2 subsets
+            for idx in rng.sample(range(m), min(2, m)):
+                subsets[idx].add(e)
+        for subset in subsets: # every subset with at least 1 element
+            if not subset:
+                subset.add(rng.choice(elements))
+        pairs = sum(len(subset) for subset in subsets)
+        target = int(density * n * m)
+        while pairs < target:
+            subset = subsets[rng.randrange(m)]
+            e = rng.choice(elements)
+            if e not in subset:
+                subset.add(e)
+                pairs += 1
+
+    _cover_missing(rng, universe, subsets)
+    return universe, subsets, planted
+
+# seeded random integer costs in 1..max_cost, one per subset
+def random_costs(m, max_cost, seed):
+    rng = random.Random(seed)
+    return [rng.randint(1, max_cost) for _ in range(m)]
+
+# save an instance in the input format: "n m", then one line "size e1 e2 ..." per subset
+# with costs, the weighted format: "n m 1", then one line "cost size e1 e2 ..." per subset
+def write_instance(filename, universe, subsets, costs=None):
+    with open(filename, 'w') as f:
+        f.write(f"{len(universe)} {len(subsets)}" + (" 1\n" if costs is not None else "\n"))
+        for idx, subset in enumerate(subsets):
+            prefix = f"{costs[idx]} " if costs is not None else ""
+            f.write(prefix + str(len(subset)) + ' ' + ' '.join(map(str, sorted(subset))) + '\n')
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-kind',default='random',choices=KINDS,help='Shape of the instance')
+    parser.add_argument('-n',type = int,required=True,help='Number of elements')
+    parser.add_argument('-m',type = int,required=True,help='Number of subsets')
+    parser.add_argument('-density',type = float,default=0.05,help='Density of the instance, see the top of generate.py')
+    parser.add_argument('-seed',type = int,default=0,help='Random seed')
+    parser.add_argument('-out',required = True,help='Output filename')
+    parser.add_argument('-costs',type = int,default=0,help='Largest cost of a subset, 0 writes an unweighted instance')
+    args = parser.parse_args()
+
+    universe, subsets, planted = generate(args.kind, args.n, args.m, args.density, args.seed)
+    costs = random_costs(len(subsets), args.costs, args.seed) if args.costs > 0 else None
+    write_instance(args.out, universe, subsets, costs)
+    if planted is not None:
+        print(f"planted cover of size {planted}")
+
+if __name__ == "__main__":
+
+    main()
@@ -5,19 +5,30 @@
 import random
 import time
 import math
+from incumbent import offer
+from bitset import BitsetKernel
+from approx import build_element_index, lazy_greedy
+
+# restart engines of hill_climbing()
+# prune: randomized greedy cover, then every redundant subset is dropped in one pass over the element cover counts
+# legacy: greedy cover, then get_best_neighbor() removes one subset at a time and checks the whole cover again
+ENGINES = ["prune", "legacy"]
 
 # check if the solution is a valid cover
 def is_valid_cover(universe,solution_indices,subsets):
     covered = set().union(*(subsets[i] for i in solution_indices))
     return covered == universe
 
-# check if the cost of a solution
-def cost(solution):
-    return len(solution)
+# check if the cost of a solution: its size, or the sum of the costs of its subsets for a weighted instance
+def cost(solution, costs=None):
+    if costs is None:
+        return len(solution)
+    return sum(costs[i] for i in solution)
 
 # get the best next state based on current solution which is one less than or the same as current solution
 # return the best neighbor
-def get_best_neighbor(current_solution, subsets, universe):
+# if a stats dict is given, its neighbor and feasibility check counters are updated
+def get_best_neighbor(current_solution, subsets, universe, stats=None):
 
     neighbor = current_solution[:]
     choices = neighbor # have a list of choices which for now is current solution
@@ -26,6 +37,7 @@ def get_best_neighbor(current_solution, subsets, universe):
     test = list(set(neighbor)-set([to_remove])) # remove the choice from the neighbor
     choices = test # update the choice list
     valid = is_valid_cover(universe,test,subsets)  # test if test is a valid cover
+    checks = 1
 
     # loop the same process as before until finding a valid cover or there's no choice for index to remove
     while not valid and len(choices) > 0:
@@ -33,78 +45,231 @@ def get_best_neighbor(current_solution, subsets, universe):
         test = list(set(neighbor)-set([to_remove]))
         choices = list(set(choices)-set([to_remove]))
         valid = is_valid_cover(universe,test,subsets)
+        checks += 1
 
     if valid:
         neighbor = test
 
+    if stats is not None:
+        stats["neighbors"] += 1
+        stats["feasibility_checks"] += checks
+
     return neighbor
 
 # get the random initial solutio
 # return the solution indices 
-def get_random_initial(subsets, universe):
+# with a BitsetKernel of the instance the greedy part runs on the kernel, it does not touch the subsets list
+# and the indices it returns all refer to the subsets list
+# with costs, the greedy part takes the subset covering the most uncovered elements per unit of cost
+def get_random_initial(subsets, universe, kernel=None, costs=None):
+
+    if kernel is not None:
+        random_choice = random.randint(0, len(subsets)-1) # randomly choose an index of a subset
+        uncovered = kernel.full & ~kernel.matrix[random_choice] # remove the chosen subset from the universe
+        return [random_choice] + kernel.greedy(uncovered, excluded=[random_choice])
 
     uncovered = set(universe) # the set of uncovered set for universe
-    left_subsets = subsets # subset for randomly choose
     solution_indices = []
     random_choice = random.randint(0, len(subsets)-1) # randomly choose an index of a subset
     solution_indices.append(random_choice) # add the chosen index to the solution
     uncovered -= subsets[random_choice] # remove the chosen subset from the universe
-    temp = subsets[random_choice] # store the chosen subset for now
-
-    left_subsets.remove(temp) # remove the chosen subset from the list of choices so that it will not be chosen again
+    # the chosen subset covers nothing uncovered any more, so the greedy loop never picks it again
+    # (the subsets list is left as it is, every index refers to it)
 
     # loop until all element in universe covered
     while uncovered:
         # choose the subset that covers most uncovered part of universe
-        best_index = max(range(len(left_subsets)), key=lambda i: len(left_subsets[i] & uncovered))
+        if costs is None:
+            best_index = max(range(len(subsets)), key=lambda i: len(subsets[i] & uncovered))
+        else:
+            best_index = max(range(len(subsets)), key=lambda i: len(subsets[i] & uncovered) / costs[i])
         # add the chosen subset into the solution 
         solution_indices.append(best_index)
         # removed the chosen subset from the uncovered part because now it is covered
         uncovered -= subsets[best_index]
 
-    # add what removed from subset back to keep the subset the same
-    left_subsets.append(temp)
-
     return solution_indices
 
-    
+
+# randomized greedy cover for the prune engine: a random first subset, then lazy greedy (lazy_greedy() of approx.py)
+# with ties between equal gains broken at random, by the bitset kernel too
+# with costs, the subsets are scored by cost per newly covered element instead (see greedy_set_cover_weighted())
+# the subsets are only read, so the instance can be shared between threads or processes
+# start (indices) replaces the random first subset, e.g. part of a previous cover to restart next to it
+# return the solution indices (0-indexed, into subsets)
+def get_randomized_greedy(subsets, universe, index, rng, kernel=None, costs=None, start=None):
+    if start is None:
+        start = [rng.randrange(len(subsets))] # randomly choose an index of a subset
+    if kernel is not None:
+        uncovered = kernel.full & ~kernel.union(start)
+        return list(start) + kernel.greedy(uncovered, excluded=start, rng=rng)
+    if costs is None:
+        score = lambda idx, g: -g
+    else:
+        score = lambda idx, g: costs[idx] / g # cost per new element
+    return lazy_greedy(universe, subsets, index, score, tie=rng.random, chosen=start)
+
+# drop every redundant subset of a cover in one pass, in random order
+# a subset is redundant when every element it covers is covered by another subset of the cover
+# with costs, the most expensive subsets are tried first (in random order among equal costs)
+# the result is a local optimum of get_best_neighbor(): no single subset can be removed
+# if a stats dict is given, its neighbor and feasibility check counters are updated
+def eliminate_redundant(solution, subsets, rng, stats=None, costs=None):
+    count = {} # number of subsets of the cover covering every element
+    for i in solution:
+        for e in subsets[i]:
+            count[e] = count.get(e, 0) + 1
+    order = solution[:]
+    rng.shuffle(order)
+    if costs is not None:
+        order.sort(key=lambda i: -costs[i]) # stable, equal costs stay shuffled
+    kept = []
+    removed = 0
+    for i in order:
+        if all(count[e] > 1 for e in subsets[i]):
+            for e in subsets[i]:
+                count[e] -= 1
+            removed += 1
+        else:
+            kept.append(i)
+    if stats is not None:
+        stats["neighbors"] += 1
+        stats["feasibility_checks"] += len(order)
+        stats["improving_moves"] += removed
+    return kept
+
 # random restart hill climbing
-def hill_climbing(universe, subsets, max_iterations=10000,seed = 42,cutoff = 1000):
-    random.seed(seed)
+# with a shared incumbent (see incumbent.py) the best sizes are published to the other processes, and the run
+# stops after 100 restarts that could not beat the best size of all processes
+# if a stats dict is given, it is filled with the restart and move counters of the search
+# the prune engine draws from its own random.Random(seed), so runs in threads do not share a generator
+# on_improve(time, size) is called for every point added to the trace
+# initial_solution (a cover, 0-indexed) replaces the first random restart, e.g. for a warm start (see warm.py). The
+# prune engine then restarts next to the best cover instead of from scratch: a random half of it is kept and the
+# randomized greedy completes it
+# checkpoint (see checkpoint.py) saves the best solution, the random state and the trace periodically and when the
+# search stops, resume is such a saved state to continue from. The time of the previous runs counts in the trace,
+# cutoff is the time of this run
+# target is a size the search stops at (e.g. a proven lower bound, see bounds.py), None searches until the cutoff
+# costs are the costs of the subsets of a weighted instance: the search then minimizes the total cost, the trace, the
+# incumbent and target hold costs instead of sizes, and the bitset backend is not used
+def hill_climbing(universe, subsets, max_iterations=10000,seed = 42,cutoff = 1000,backend = "set",incumbent = None,stats = None,engine = "prune",on_improve = None,
+                  initial_solution = None,checkpoint = None,resume = None,target = None,costs = None):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown hill climbing engine: {engine}")
+    if engine == "legacy":
+        random.seed(seed)
+    rng = random.Random(seed)
     start = time.time()
     trace_time = []
     trace_sol = []
 
-    current_solution = get_random_initial(subsets,universe) # get initial solution
-    best_solution = current_solution[:] # set this initial solution as the initial best solution 
-    trace_time.append(round(time.time() - start,4))
-    trace_sol.append(len(best_solution))
+    kernel = BitsetKernel(universe, subsets) if backend == "bitset" and costs is None else None
+    if engine == "prune":
+        index = build_element_index(subsets) if kernel is None else None
+    if resume is not None:
+        start = resume["load_start"] - resume["elapsed"] # the load of the checkpoint counts in this run
+        cutoff += resume["elapsed"]
+        if engine == "legacy":
+            random.setstate(resume["random"])
+        else:
+            rng.setstate(resume["random"])
+        best_solution = list(resume["best_solution"])
+        trace_time, trace_sol = list(resume["trace_time"]), list(resume["trace_sol"])
+        track_converge = resume["track_converge"]
+        first = resume["iteration"]
+        warm = resume["warm"]
+    else:
+        if initial_solution is not None:
+            current_solution = list(initial_solution)
+        elif engine == "prune":
+            current_solution = eliminate_redundant(get_randomized_greedy(subsets,universe,index,rng,kernel,costs), subsets, rng, costs=costs) # get initial solution
+        else:
+            current_solution = get_random_initial(subsets,universe,kernel,costs) # get initial solution
+        best_solution = current_solution[:] # set this initial solution as the initial best solution 
+        trace_time.append(round(time.time() - start,4))
+        trace_sol.append(cost(best_solution, costs))
+        if on_improve is not None:
+            on_improve(trace_time[-1], trace_sol[-1])
+        track_converge = 0 # track for convergence of the algorithm
+        first = 0
+        warm = initial_solution is not None
+    best_cost = cost(best_solution, costs) # kept up to date instead of summing best_solution on every comparison
+    if incumbent is not None:
+        offer(incumbent, best_cost)
     
-    track_converge = 0 # track for convergence of the algorithm
+    if stats is not None:
+        stats.update(restarts = 0, neighbors = 0, feasibility_checks = 0, improving_moves = 0, improvements = 0)
+
+    # state saved by the checkpoints
+    iteration = first
+    def checkpoint_state():
+        return {"best_solution": best_solution[:], "track_converge": track_converge, "iteration": iteration, "warm": warm,
+                "random": random.getstate() if engine == "legacy" else rng.getstate(),
+                "trace_time": trace_time[:], "trace_sol": trace_sol[:], "elapsed": time.time() - start}
 
-    for _ in range(max_iterations):
+    for iteration in range(first, max_iterations):
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(checkpoint_state())
         if (time.time()-start) > cutoff:
             break
         if track_converge > 100: # if the best solution is not updated after 100 iterations, then it stops
             break
+        if target is not None and best_cost <= target: # the best solution is good enough
+            break
 
         track_converge += 1
 
-        current_solution = get_random_initial(subsets,universe) # get another initial solution: random restart
-        neighbor = get_best_neighbor(current_solution, subsets, universe) # find the best next state
+        if engine == "prune":
+            # random restart: a new randomized greedy cover reduced to a local optimum in one pass
+            # (a warm start keeps a random half of the best cover, so it stays next to the repaired cover)
+            kept = rng.sample(best_solution, len(best_solution) // 2) if warm and len(best_solution) > 1 else None
+            neighbor = eliminate_redundant(get_randomized_greedy(subsets,universe,index,rng,kernel,costs,kept), subsets, rng, stats, costs)
+            if stats is not None:
+                stats["restarts"] += 1
+            neighbor_cost = cost(neighbor, costs)
+            if neighbor_cost < best_cost:
+                if incumbent is None or offer(incumbent, neighbor_cost):
+                    track_converge = 0
+                best_solution = neighbor
+                best_cost = neighbor_cost
+                trace_time.append(round(time.time() - start,4))
+                trace_sol.append(best_cost)
+                if on_improve is not None:
+                    on_improve(trace_time[-1], trace_sol[-1])
+                if stats is not None:
+                    stats["improvements"] += 1
+            continue
+
+        current_solution = get_random_initial(subsets,universe,kernel,costs) # get another initial solution: random restart
+        neighbor = get_best_neighbor(current_solution, subsets, universe, stats) # find the best next state
+        if stats is not None:
+            stats["restarts"] += 1
 
-        # loop until there's no better neighbor
+        # loop until there's no better neighbor (a neighbor only drops subsets, so it is cheaper whenever it is smaller)
         while cost(neighbor) < cost(current_solution):
             current_solution = neighbor 
-            neighbor = get_best_neighbor(current_solution, subsets, universe) #find the best next state based on current solution
+            neighbor = get_best_neighbor(current_solution, subsets, universe, stats) #find the best next state based on current solution
+            if stats is not None:
+                stats["improving_moves"] += 1
 
         # when there's no better solution, check if this random initial gives a better local optimum
-        if cost(neighbor) < cost(best_solution):
-            track_converge = 0
+        neighbor_cost = cost(neighbor, costs)
+        if neighbor_cost < best_cost:
+            if incumbent is None or offer(incumbent, neighbor_cost):
+                track_converge = 0
             best_solution = neighbor # assign the current solution to the neighbor
+            best_cost = neighbor_cost
+            if stats is not None:
+                stats["improvements"] += 1
             trace_time.append(round(time.time() - start,4))
-            trace_sol.append(len(best_solution))
-
+            trace_sol.append(best_cost)
+            if on_improve is not None:
+                on_improve(trace_time[-1], trace_sol[-1])
+    else:
+        iteration = max_iterations # every restart is done
+    if checkpoint is not None:
+        checkpoint.save(checkpoint_state())
 
     end = time.time()
     time_stamp = end - start
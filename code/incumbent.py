@@ -0,0 +1,19 @@
+# This file implements the incumbent shared by the processes of a parallel run
+# it is the best cover size found so far by any process, kept in shared memory
+# (the best cover cost for a weighted instance)
+
+import multiprocessing
+
+# create the shared incumbent, it has to be given to the worker processes when they are created
+# a float size (a cost of a weighted instance, or inf) makes it a double instead of an int
+def new_incumbent(size):
+    return multiprocessing.Value('d' if isinstance(size, float) else 'i', size)
+
+# offer a cover size to the shared incumbent
+# return true if it is a new best for all processes
+def offer(incumbent, size):
+    with incumbent.get_lock():
+        if size < incumbent.value:
+            incumbent.value = size
+            return True
+    return False
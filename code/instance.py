@@ -0,0 +1,258 @@
+# This file implements the instance readers and the binary instance cache
+# the text instance is streamed in chunks of lines and checked while it is read, so a malformed or
+# uncoverable instance fails before any algorithm starts
+# the first run with the cache parses the text instance once and writes it next to it as <instance>.csr,
+# later runs memory-map that file instead of parsing the text again
+#
+# a weighted instance has a third field 1 in its first line ("n m 1") and every subset line starts with the cost
+# of the subset ("cost size e1 e2 ..."), costs are positive integers or decimals. The readers fill the costs list
+# they are given, an unweighted instance leaves it empty
+#
+# layout of a .csr file (byte order of the machine that wrote it, every array starts at a multiple of 8 bytes):
+# - header: magic, n, m, number of (subset, element) pairs, size and sha1 of the text instance, weighted flag
+# - subset_ptr (int64, m+1) and subset_elems (int32): elements of subset i are subset_elems[subset_ptr[i]:subset_ptr[i+1]]
+# - elem_ptr (int64, n+1) and elem_subsets (int32): subsets (0-indexed) covering element e are elem_subsets[elem_ptr[e-1]:elem_ptr[e]]
+# - costs (float64, m): only in the cache of a weighted instance
+
+import os
+import math
+import mmap
+import struct
+import hashlib
+from array import array
+
+MAGIC = b"SCCSR\x00\x01\x00"
+HEADER = struct.Struct("=8sqqqq20sI") # magic, n, m, nnz, source size, source sha1, weighted (it was the padding to 8 bytes)
+
+CHUNK_BYTES = 1 << 24 # the text instance is read about 16MB of lines at a time
+
+# raised when the instance is malformed or some element is in no subset
+class InstanceError(ValueError):
+    pass
+
+# cost of a subset line, an int when it is integral so unit and integer costs stay exact
+def parse_cost(token):
+    cost = float(token)
+    return int(cost) if cost.is_integer() else cost
+
+# read the text instance chunk by chunk, only one chunk of lines is held in memory
+# yield (n, m) first, then the elements of every subset (a list of ints) in order
+# the costs of a weighted instance are appended to costs, which must be given for such an instance
+# progress(bytes_read, total_bytes) is called after every chunk if given
+def iter_subsets(path, progress=None, costs=None):
+    total = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        done = len(header)
+        try:
+            fields = list(map(int, header.split()))
+            n, m = fields[:2]
+        except ValueError:
+            raise InstanceError(f"{path}: the first line must be 'n m', got {header[:80]!r}")
+        if len(fields) > 3 or (len(fields) == 3 and fields[2] not in (0, 1)):
+            raise InstanceError(f"{path}: the first line must be 'n m' or 'n m 1' for a weighted instance, got {header[:80]!r}")
+        weighted = len(fields) == 3 and fields[2] == 1
+        if weighted and costs is None:
+            raise InstanceError(f"{path}: the instance has subset costs, which this reader does not support")
+        if n < 0 or m < 0:
+            raise InstanceError(f"{path}: n and m must not be negative")
+        yield n, m
+
+        covered = set() # elements seen in some subset, no longer updated once it holds all of them
+        line_number = 1
+        idx = 0
+        while idx < m:
+            lines = f.readlines(CHUNK_BYTES)
+            if not lines:
+                raise InstanceError(f"{path}: expected {m} subsets, found {idx}")
+            for line in lines:
+                line_number += 1
+                done += len(line)
+                if idx == m:
+                    break # lines after the last subset are ignored
+                if weighted:
+                    tokens = line.split()
+                    try:
+                        cost = parse_cost(tokens[0]) if tokens else 0
+                        parts = list(map(int, tokens[1:]))
+                    except ValueError:
+                        raise InstanceError(f"{path}:{line_number}: a subset line is its cost then a list of integers")
+                    if not cost > 0 or math.isinf(cost):
+                        raise InstanceError(f"{path}:{line_number}: the cost of a subset must be a positive number")
+                    costs.append(cost)
+                else:
+                    try:
+                        parts = list(map(int, line.split()))
+                    except ValueError:
+                        raise InstanceError(f"{path}:{line_number}: subsets must be lists of integers")
+                if not parts or parts[0] != len(parts) - 1:
+                    raise InstanceError(f"{path}:{line_number}: a subset line is its size followed by its elements")
+                elements = parts[1:]
+                if elements and (min(elements) < 1 or max(elements) > n):
+                    bad = next(e for e in elements if not 1 <= e <= n)
+                    raise InstanceError(f"{path}:{line_number}: element {bad} is not in 1..{n}")
+                if len(covered) < n:
+                    covered.update(elements)
+                idx += 1
+                yield elements
+            if progress is not None:
+                progress(done, total)
+
+        if len(covered) < n:
+            missing = next(e for e in range(1, n + 1) if e not in covered)
+            raise InstanceError(f"{path}: cannot cover all elements in the universe, element {missing} is in no subset")
+
+# stream the text instance into the universe and a list of sets, as read_file() in script.py returns them
+def read_sets(path, progress=None, costs=None):
+    subsets_iter = iter_subsets(path, progress, costs)
+    n, m = next(subsets_iter)
+    return set(range(1, n + 1)), [set(elements) for elements in subsets_iter]
+
+# stream the text instance into the (bitmask, size, idx) tuples, as read_input_bnb() in BnB.py returns them
+# every bitmask is built in one reused bytearray instead of shifting a growing int for every element
+def read_bitmasks(path, progress=None, costs=None):
+    subsets_iter = iter_subsets(path, progress, costs)
+    n, m = next(subsets_iter)
+    row = bytearray((n + 7) // 8)
+    subsets = []
+    for idx, elements in enumerate(subsets_iter):
+        for e in elements:
+            row[(e - 1) >> 3] |= 1 << ((e - 1) & 7)
+        subsets.append((int.from_bytes(row, 'little'), len(elements), idx))
+        for e in elements: # clear only the bytes that were set
+            row[(e - 1) >> 3] = 0
+    return n, m, subsets
+
+def cache_path(path):
+    return path + ".csr"
+
+# sha1 of the text instance, the cache is only used if it matches
+def checksum(path):
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha1").digest()
+
+# stream the text instance into CSR arrays
+# return n, m, subset_ptr, subset_elems, costs (an empty array for an unweighted instance)
+def parse_csr(path, progress=None):
+    costs = array('d')
+    subsets_iter = iter_subsets(path, progress, costs)
+    n, m = next(subsets_iter)
+    subset_ptr = array('q', [0])
+    subset_elems = array('i')
+    for elements in subsets_iter:
+        subset_elems.extend(elements)
+        subset_ptr.append(len(subset_elems))
+    return n, m, subset_ptr, subset_elems, costs
+
+# build the inverted element index from the subset arrays, in increasing subset order
+# return elem_ptr, elem_subsets
+def invert(n, m, subset_ptr, subset_elems):
+    elem_ptr = array('q', bytes(8 * (n + 1)))
+    for e in subset_elems:
+        elem_ptr[e] += 1
+    for e in range(1, n + 1):
+        elem_ptr[e] += elem_ptr[e - 1]
+    fill = array('q', elem_ptr[:-1]) # next free slot of every element
+    elem_subsets = array('i', bytes(4 * len(subset_elems)))
+    for idx in range(m):
+        for k in range(subset_ptr[idx], subset_ptr[idx + 1]):
+            e = subset_elems[k]
+            elem_subsets[fill[e - 1]] = idx
+            fill[e - 1] += 1
+    return elem_ptr, elem_subsets
+
+# write one array and pad it to a multiple of 8 bytes
+def _write_array(f, values):
+    data = values.tobytes()
+    f.write(data)
+    f.write(bytes(-len(data) % 8))
+
+# parse the text instance and write its cache, the file is replaced atomically
+def write_cache(path, csr_path=None, progress=None):
+    csr_path = csr_path or cache_path(path)
+    n, m, subset_ptr, subset_elems, costs = parse_csr(path, progress)
+    elem_ptr, elem_subsets = invert(n, m, subset_ptr, subset_elems)
+    tmp_path = csr_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, n, m, len(subset_elems), os.path.getsize(path), checksum(path), len(costs) > 0))
+        for values in (subset_ptr, subset_elems, elem_ptr, elem_subsets):
+            _write_array(f, values)
+        if costs:
+            _write_array(f, costs)
+    os.replace(tmp_path, csr_path)
+
+class CSRInstance:
+    """
+    Memory-mapped instance, the arrays are memoryviews on the .csr file
+    - n, m: number of elements and subsets
+    - subset_ptr, subset_elems, elem_ptr, elem_subsets: the CSR arrays described at the top of this file
+    - weighted: true if the instance has subset costs, see costs()
+    """
+
+    def __init__(self, csr_path):
+        with open(csr_path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, self.m, self.nnz, self.source_size, self.source_sha1, self.weighted = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise ValueError(f"{csr_path} is not an instance cache.")
+        view = memoryview(self.map)
+        offset = HEADER.size
+        arrays = []
+        for typecode, length in (('q', self.m + 1), ('i', self.nnz), ('q', self.n + 1), ('i', self.nnz), ('d', self.m if self.weighted else 0)):
+            size = length * (4 if typecode == 'i' else 8)
+            arrays.append(view[offset:offset + size].cast(typecode))
+            offset += size + (-size % 8)
+        self.subset_ptr, self.subset_elems, self.elem_ptr, self.elem_subsets, self.cost_array = arrays
+
+    # elements of subset idx (0-indexed)
+    def subset(self, idx):
+        return self.subset_elems[self.subset_ptr[idx]:self.subset_ptr[idx + 1]]
+
+    # subsets (0-indexed) covering element e
+    def covering(self, e):
+        return self.elem_subsets[self.elem_ptr[e - 1]:self.elem_ptr[e]]
+
+    # universe and list of sets, as read_file() in script.py returns them
+    def sets(self):
+        return set(range(1, self.n + 1)), [set(self.subset(idx)) for idx in range(self.m)]
+
+    # costs of the subsets as parse_cost() reads them, None for an unweighted instance
+    def costs(self):
+        if not self.weighted:
+            return None
+        return [int(cost) if cost.is_integer() else cost for cost in self.cost_array]
+
+    # n, m and the (bitmask, size, idx) tuples, as read_input_bnb() in BnB.py returns them
+    # (read_bitmasks() builds them the same way from the text instance)
+    def bitmasks(self):
+        row = bytearray((self.n + 7) // 8)
+        subsets = []
+        for idx in range(self.m):
+            elements = self.subset(idx)
+            for e in elements:
+                row[(e - 1) >> 3] |= 1 << ((e - 1) & 7)
+            subsets.append((int.from_bytes(row, 'little'), len(elements), idx))
+            for e in elements: # clear only the bytes that were set
+                row[(e - 1) >> 3] = 0
+        return self.n, self.m, subsets
+
+    # element -> subsets covering it, usable as the index of greedy_set_cover_lazy() in approx.py
+    def element_index(self):
+        return ElementIndex(self)
+
+class ElementIndex:
+    def __init__(self, csr):
+        self.csr = csr
+
+    def __getitem__(self, e):
+        return self.csr.covering(e)
+
+# open the cache of a text instance, it is (re)built if it is missing or does not match the text instance
+def load_csr(path, csr_path=None, progress=None):
+    csr_path = csr_path or cache_path(path)
+    if os.path.exists(csr_path):
+        csr = CSRInstance(csr_path)
+        if csr.source_size == os.path.getsize(path) and csr.source_sha1 == checksum(path):
+            return csr
+    write_cache(path, csr_path, progress)
+    return CSRInstance(csr_path)
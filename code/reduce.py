@@ -0,0 +1,134 @@
+# This file implements the reductions applied to an instance before any algorithm runs
+# reduce_instance() will be called in script.py
+# and return the smaller instance plus a Reduction that maps its solutions back to the original subsets
+
+import time
+
+class Reduction:
+    """
+    - forced: original indices (0-indexed) of the subsets every cover has to contain
+    - mapping: mapping[i] is the original index (0-indexed) of subset i of the reduced instance
+    - stats: size of the instance before and after, number of subsets removed by each rule and the time it took
+    - costs: costs of the subsets of the reduced instance, None for an unweighted instance
+    - forced_cost: total cost of the forced subsets (their number for an unweighted instance)
+    """
+
+    def __init__(self, forced, mapping, stats, costs=None, forced_cost=None):
+        self.forced = forced
+        self.mapping = mapping
+        self.stats = stats
+        self.costs = costs
+        self.forced_cost = len(forced) if forced_cost is None else forced_cost
+
+    # map a solution of the reduced instance (0-indexed) to a solution of the original one (0-indexed)
+    def lift(self, solution):
+        return self.forced + [self.mapping[i] for i in solution]
+
+def reduce_instance(universe, subsets, costs=None):
+    """
+    Apply the reductions until none of them changes the instance:
+    - duplicate subsets: only the one with the smallest index is kept (the cheapest one with costs)
+    - dominated subsets: a subset contained in another subset is removed (with costs, only if the other one is not more expensive)
+    - forced subsets: the only subset covering an element is taken, its elements are removed from the universe
+    - dominated elements: if every subset covering e also covers f, covering e covers f, so f is removed
+
+    Parameters:
+    - universe: set of elements to cover
+    - subsets: list of sets
+    - costs: cost of every subset, None for unit costs
+
+    Returns:
+    - universe: set(range(1, n'+1)), the elements left are renumbered in increasing order
+    - subsets: list of the subsets left, renumbered the same way and in their original order
+    - reduction: Reduction of the instance
+    """
+    start = time.time()
+    uncovered = set(universe) # elements left to cover
+    alive = {idx: subset & uncovered for idx, subset in enumerate(subsets)} # subsets left, restricted to the uncovered elements
+    forced = []
+    removed = {"duplicate": 0, "dominated": 0, "forced": 0, "empty": 0, "dominated_elements": 0}
+
+    changed = True
+    while changed:
+        changed = False
+
+        # drop empty subsets and duplicates, the smallest index of a group of equal subsets is kept
+        seen = set()
+        for idx in sorted(alive, key=None if costs is None else lambda i: (costs[i], i)):
+            subset = alive[idx]
+            key = frozenset(subset)
+            if not subset or key in seen:
+                del alive[idx]
+                removed["empty" if not subset else "duplicate"] += 1
+                changed = True
+            else:
+                seen.add(key)
+
+        # element -> indices of the subsets covering it
+        index = {e: [] for e in uncovered}
+        for idx, subset in alive.items():
+            for e in subset:
+                index[e].append(idx)
+
+        # forced subsets
+        taken = set()
+        for e in sorted(uncovered):
+            if not index[e]:
+                raise ValueError(f"Element {e} is not covered by any subset.")
+            if len(index[e]) == 1 and index[e][0] not in taken:
+                taken.add(index[e][0])
+        if taken:
+            for idx in sorted(taken):
+                forced.append(idx)
+                uncovered -= alive.pop(idx)
+            for idx in alive:
+                alive[idx] &= uncovered
+            removed["forced"] += len(taken)
+            changed = True
+            continue # the index is stale, start over
+
+        # dominated subsets: a superset has to contain the rarest element of the subset
+        for idx in sorted(alive, key=lambda i: len(alive[i])):
+            subset = alive[idx]
+            rarest = min(subset, key=lambda e: len(index[e]))
+            for other in index[rarest]:
+                if (other != idx and other in alive and len(alive[other]) > len(subset) and subset <= alive[other]
+                        and (costs is None or costs[other] <= costs[idx])):
+                    del alive[idx]
+                    index[rarest].remove(idx)
+                    removed["dominated"] += 1
+                    changed = True
+                    break
+        if changed:
+            continue
+
+        # dominated elements: f is in every subset covering e, the one with the smallest number is kept on ties
+        for e in sorted(uncovered):
+            if e not in uncovered:
+                continue
+            common = set.intersection(*(alive[idx] for idx in index[e])) & uncovered
+            for f in common:
+                if f != e and (len(index[f]) > len(index[e]) or f > e):
+                    uncovered.discard(f)
+                    removed["dominated_elements"] += 1
+                    changed = True
+        if changed:
+            for idx in alive:
+                alive[idx] &= uncovered
+
+    # renumber the elements left to 1..n'
+    number = {e: k + 1 for k, e in enumerate(sorted(uncovered))}
+    mapping = sorted(alive)
+    reduced_subsets = [set(number[e] for e in alive[idx]) for idx in mapping]
+    reduced_universe = set(range(1, len(number) + 1))
+
+    stats = {
+        "n": len(universe), "m": len(subsets),
+        "reduced_n": len(reduced_universe), "reduced_m": len(reduced_subsets),
+        "removed": removed,
+        "time": time.time() - start,
+    }
+    if costs is None:
+        return reduced_universe, reduced_subsets, Reduction(forced, mapping, stats)
+    return reduced_universe, reduced_subsets, Reduction(forced, mapping, stats, [costs[idx] for idx in mapping],
+                                                        sum(costs[idx] for idx in forced))
@@ -1,125 +1,441 @@
 import argparse
+import json
+import math
+import cProfile
 import time
 import random
 import os
-from hill import hill_climbing
-from SA import simulated_annealing
-from approx import greedy_set_cover
-from BnB import branch_and_bound, greedy_set_cover_bnb
+import sys
+import multiprocessing
+from hill import hill_climbing, ENGINES as HILL_ENGINES
+from SA import simulated_annealing, ENGINES as SA_ENGINES
+from approx import greedy_set_cover, ENGINES as GREEDY_ENGINES
+from bounds import lower_bounds, sets_from_bitmasks, target_size
+from reduce import reduce_instance
+from incumbent import new_incumbent, offer
+from instance import load_csr, read_sets, checksum
+from checkpoint import Checkpoint, load_checkpoint
+from BnB import read_input_bnb, branch_and_bound, parallel_branch_and_bound, greedy_set_cover_bnb, bitmasks_from_sets, STRATEGIES, BRANCHINGS, BOUNDS
+
+ALGORITHMS = ['BnB','Approx','hill','annealing']
+
+# options of the algorithms, shared with batch.py
+def add_solver_arguments(parser):
+    parser.add_argument('-engine',default='scan',choices=GREEDY_ENGINES,help='Engine used by the Approx algorithm')
+    parser.add_argument('-hillengine',default='prune',choices=HILL_ENGINES,help='Restart engine used by hill')
+    parser.add_argument('-saengine',default='anneal',choices=SA_ENGINES,help='Engine used by annealing')
+    parser.add_argument('-backend',default='set',choices=['set','bitset'],help='Coverage backend used by hill and annealing')
+    parser.add_argument('-strategy',default='bfs',choices=STRATEGIES,help='Search order used by BnB')
+    parser.add_argument('-nodecap',type = int,default=1000000,help='Number of queued BnB nodes after which hybrid switches from best-first to depth-first')
+    parser.add_argument('-branching',default='subset',choices=BRANCHINGS,help='Branching rule used by BnB')
+    parser.add_argument('-bound',default='size',choices=BOUNDS,help='Lower bound used by BnB')
+    parser.add_argument('-ttsize',type = int,default=0,help='Entries of the BnB transposition table, 0 disables it')
+    parser.add_argument('-bnbworkers',type = int,default=1,help='Number of processes of BnB, more than 1 runs parallel BnB')
+    parser.add_argument('-splitdepth',type = int,default=8,help='Maximum depth at which parallel BnB splits the tree into subtrees')
+    parser.add_argument('-cache',action='store_true',help='Load the instance from its binary cache <filename>.csr, written on the first run')
+    parser.add_argument('-progress',action='store_true',help='Report the progress of reading the instance on stderr')
+    parser.add_argument('-reduce',action='store_true',help='Reduce the instance (forced, dominated and duplicate subsets, dominated elements) before solving')
+    parser.add_argument('-stats',action='store_true',help='Count the work of the algorithm and write it to a .stats.json file next to the .sol file')
+    parser.add_argument('-profile',action='store_true',help='Run the algorithm under cProfile and write the profile to a .prof file next to the .sol file')
+    parser.add_argument('-lowerbound',action='store_true',help='Compute a lower bound of the instance, write the gap in the trace and stop once the gap is at most -tolerance')
+    parser.add_argument('-tolerance',type = float,default=0,help='Relative gap (size - bound) / size at which the algorithms stop, used with -lowerbound')
 
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument('-inst',required = True, help='Input filename')
-    parser.add_argument('-alg',required=True,choices=['BnB','Approx','hill','annealing'],help='Algorithm')
+    parser.add_argument('-alg',choices=ALGORITHMS,help='Algorithm')
     parser.add_argument('-time',type = float, required=True,help='Cutoff in seconds')
     parser.add_argument('-seed',type = int, help='Random seed')
+    add_solver_arguments(parser)
+    parser.add_argument('-portfolio',help='Comma separated algorithms to run together on a process pool, e.g. hill,annealing')
+    parser.add_argument('-seeds',type = int,default=1,help='Number of seeds per algorithm in the portfolio, starting from -seed')
+    parser.add_argument('-workers',type = int,default=os.cpu_count(),help='Number of processes of the portfolio')
+    parser.add_argument('-checkpoint',help='Save the search state of BnB, hill or annealing to this file periodically and at the end')
+    parser.add_argument('-checkpointevery',type = float,default=60,help='Seconds between two checkpoints')
+    parser.add_argument('-resume',help='Continue the search saved in this checkpoint file (a missing file starts a new search)')
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.portfolio and (args.checkpoint or args.resume):
+        parser.error("-checkpoint and -resume do not work with -portfolio")
+    if args.portfolio:
+        for algo in args.portfolio.split(','):
+            if algo not in ALGORITHMS:
+                parser.error(f"unknown algorithm in -portfolio: {algo}")
+    elif args.alg is None:
+        parser.error("-alg is required unless -portfolio is given")
+    return args
 
-def read_file(file_path):
-    with open(file_path,"r") as f:
-        lines = f.readlines()
-        n,m = map(int,lines[0].split())
-        u = set(range(1,n+1))
-        s = [set(map(int,line.strip().split()[1:])) for line in lines[1:m+1]]
-    return u,s
+# the file is streamed and checked by read_sets() in instance.py, which raises InstanceError on a malformed or uncoverable instance
+# the costs of a weighted instance are appended to costs
+def read_file(file_path, progress=None, costs=None):
+    return read_sets(file_path, progress, costs)
 
 def read_optimal(file_path):
     with open(file_path,'r') as f:
         return int(f.readline().strip())
 
-def read_input_bnb(filename):
-    with open(filename, 'r') as f:
-        first_line = f.readline().split() #reads a single line from the file, splits the string by space
-        n = int(first_line[0]) #number of elements in U
-        m = int(first_line[1]) #number of subsets
-        subsets = [] #initializes an empty list to store information about each subset
-        for idx in range(m): #subset 1 to m
-            parts = list(map(int, f.readline().split())) # reads each line/subset
-            size = parts[0] #size of each subset
-            elements = parts[1:] #elements of each subset
-            bitmask = 0 #we use bitmasking(a binary number to store a set) to make the best solution finding process more efficient. We use a decimal number to represent a binary number, and that binary number’s bit positions tell us whether each element is in or out of a subset. the process is : use binary to represent a subset, and the conver the binary to a decimal, which is bitmask value
-            for e in elements:
-                bitmask |= 1 << (e - 1) #Shift 1 left by e-1 positions, then OR it with the current mask. Bitwise OR rule: A bit becomes 1 if either side is 1
-            subsets.append((bitmask, size, idx)) # a list of tuples, subset 1 to m
-    return n, m, subsets
-
-
-
- 
-def main():
-    args = parse_args()
-    filename = args.inst
-    algo = args.alg
-    # cut = float(args.time)
-    cut = args.time
-    if args.seed is not None:
-        seed = int(args.seed)
-    
+# read the instance in the representations that the algorithms need
+# with cache, the instance is memory-mapped from its binary cache (see instance.py) instead of parsed
+# return a dict with the sets (u, s), the BnB bitmasks (bnb = (n, m, subsets)), the element index
+# of the cache (index, None without it), the reduction (None if not reduced) and the costs of the subsets
+# (costs, None for an unweighted instance; the reduction holds the costs of the reduced subsets)
+def load_instance(filename, algos, reduce=False, cache=False, progress=None):
+    instance = {"reduction": None, "index": None}
+    csr = load_csr(filename, progress = progress) if cache else None
+    costs = []
+    if reduce or any(algo != "BnB" for algo in algos):
+        u,s = csr.sets() if csr is not None else read_file(filename, progress, costs)
+        if csr is not None:
+            costs = csr.costs() or []
+        if csr is not None and not reduce:
+            instance["index"] = csr.element_index()
+        # reduce the instance first, the algorithms then run on the reduced instance
+        if reduce:
+            u,s,reduction = reduce_instance(u,s,costs or None)
+            instance["reduction"] = reduction
+            stats = reduction.stats
+            print(f"Reduced {stats['n']} elements x {stats['m']} subsets to {stats['reduced_n']} x {stats['reduced_m']} "
+                  f"({len(reduction.forced)} forced subsets) in {stats['time']:.4f} seconds")
+        instance["u"], instance["s"] = u, s
+    if "BnB" in algos:
+        if reduce:
+            instance["bnb"] = (len(u), len(s), bitmasks_from_sets(s))
+        elif csr is not None:
+            instance["bnb"] = csr.bitmasks()
+            costs = csr.costs() or []
+        else:
+            costs = []
+            instance["bnb"] = read_input_bnb(filename, progress, costs)
+    instance["costs"] = costs or None
+    return instance
 
-    if algo == "hill":
-        u,s = read_file(filename)
+# cost of a cover (1-indexed) of the original instance: its size, or the sum of the costs of its subsets
+def cover_cost(cover, costs):
+    if costs is None:
+        return len(cover)
+    return sum(costs[i - 1] for i in cover)
+
+# a size or cost as it is written: the float sums of non-integer costs are rounded to 10 significant digits
+def format_size(q):
+    return f"{q:.10g}" if isinstance(q, float) else str(q)
+
+# lower bounds of a loaded instance (see bounds.py), computed once and kept in the instance
+# the bounds of a reduced instance do not count the forced subsets
+def instance_bounds(instance, cut):
+    if "bounds" not in instance:
+        costs = instance["reduction"].costs if instance["reduction"] is not None else instance["costs"]
+        if "s" in instance:
+            u, s = instance["u"], instance["s"]
+            upper = greedy_set_cover(u, s, "lazy", instance["index"], costs = costs) if u else []
+            upper = cover_cost(upper, costs)
+        else:
+            n, _, subsets = instance["bnb"]
+            u, s = sets_from_bitmasks(n, subsets)
+            upper = cover_cost([idx + 1 for idx in greedy_set_cover_bnb(n, subsets, costs)], costs)
+        instance["bounds"] = lower_bounds(u, s, upper, time_limit = min(1.0, cut / 10), costs = costs)
+    return instance["bounds"]
+
+# progress callback of the instance readers, prints how much of the file was read
+def report_progress(done, total):
+    print(f"read {done >> 20}/{total >> 20} MB ({100 * done / max(1, total):.0f}%)", file=sys.stderr)
+
+# run one algorithm on a loaded instance
+# with a shared incumbent (see incumbent.py) hill and annealing share their best sizes with other processes
+# return the cover (1-indexed, original subsets), the trace [(time, size)], the runtime and the stats
+# on a weighted instance the algorithms minimize the cost and every size of the trace is a cost
+# the BnB node stats are always collected, the counters of the other algorithms only with -stats
+# on_improve(time, size) is called for every point of the trace as soon as it is found (sizes of the original instance)
+# checkpoint and resume are passed to BnB, hill and annealing (see checkpoint.py), Approx does not use them
+# with -lowerbound, stats gets the lower bound of the instance (lower_bound, bounds) and the gap of the cover,
+# and BnB, hill and annealing stop once their gap is at most -tolerance
+def solve(algo, instance, cut, seed, args, incumbent = None, on_improve = None, checkpoint = None, resume = None):
+    reduction = instance["reduction"]
+    forced = reduction.forced_cost if reduction is not None else 0
+    costs = reduction.costs if reduction is not None else instance["costs"] # costs of the subsets the algorithms see
+    stats = {}
+    counters = stats if args.stats else None
+    target = None
+    if args.lowerbound:
+        bounds = instance_bounds(instance, cut)
+        target = target_size(bounds["best"] + forced, args.tolerance) - forced # the gap counts the forced subsets too
+    report = on_improve
+    if on_improve is not None and reduction is not None: # the forced subsets are added to every size
+        report = lambda t, q: on_improve(t, q + forced)
+
+    if reduction is not None and not instance["u"]: # the forced subsets already cover everything
+        best_cover = []
+        trace = [(0.0, 0)]
+        runtime = 0.0
+        if report is not None:
+            report(*trace[0])
+    elif algo == "hill":
         start_time = time.time()
-        best_cover,trace_time,trace_sol,_= hill_climbing(u, s,cutoff = cut,seed = seed)
-        best_cover = [x+1 for x in best_cover]
+        best_cover,trace_time,trace_sol,_= hill_climbing(instance["u"], instance["s"],cutoff = cut,seed = seed,
+                                                         backend = args.backend,incumbent = incumbent,stats = counters,
+                                                         engine = args.hillengine,on_improve = report,
+                                                         checkpoint = checkpoint,resume = resume,target = target,
+                                                         costs = costs)
         end_time = time.time()
         runtime = end_time - start_time
+        trace = list(zip(trace_time, trace_sol))
     elif algo == "annealing":
-        u,s = read_file(filename)
         start_time = time.time()
-        best_cover,trace_time,trace_sol,_= simulated_annealing(u, s,cutoff = cut,seed = seed)
-        best_cover = [x+1 for x in best_cover]
+        best_cover,trace_time,trace_sol,_= simulated_annealing(instance["u"], instance["s"],cutoff = cut,seed = seed,
+                                                               backend = args.backend,incumbent = incumbent,stats = counters,
+                                                               engine = args.saengine,on_improve = report,
+                                                               checkpoint = checkpoint,resume = resume,target = target,
+                                                               costs = costs)
         end_time = time.time()
         runtime = end_time - start_time
+        trace = list(zip(trace_time, trace_sol))
     elif algo == "Approx":
-        u,s = read_file(filename)
         start_time = time.time()
-        best_cover = greedy_set_cover(u,s)
+        best_cover = greedy_set_cover(instance["u"],instance["s"],engine = args.engine,index = instance["index"],stats = counters,
+                                      costs = costs)
+        best_cover = [x-1 for x in best_cover]
         end_time = time.time()
         runtime = end_time - start_time
+        trace = [(runtime, len(best_cover) if costs is None else sum(costs[i] for i in best_cover))]
+        if report is not None:
+            report(*trace[0])
     else:
-        n, m, subsets = read_input_bnb(filename)
-        try:
-            initial_solution = greedy_set_cover_bnb(n, subsets)
-        except ValueError as e:
-            print(f"Error: {e}", file=sys.stderr)
-            return
-        initial_size = len(initial_solution)
+        n, m, subsets = instance["bnb"]
+        if resume is not None: # the best cover of the checkpoint replaces the greedy one
+            initial_solution = resume["best_solution"]
+        else:
+            initial_solution = greedy_set_cover_bnb(n, subsets, costs)
+        initial_size = len(initial_solution) if costs is None else sum(costs[i] for i in initial_solution)
         start_time = time.time()
         trace = [(0.0, initial_size)]
-        best_cover = branch_and_bound(n, subsets, cut, initial_size, start_time, trace, initial_solution)
+        if report is not None and resume is None:
+            report(*trace[0])
+        options = dict(strategy = args.strategy, node_cap = args.nodecap, branching = args.branching, bound = args.bound,
+                       on_improve = report, table_size = args.ttsize, target = target, costs = costs)
+        if args.bnbworkers > 1:
+            if checkpoint is not None or resume is not None:
+                raise ValueError("Checkpoints are only supported with one BnB process.")
+            best_cover = parallel_branch_and_bound(n, subsets, cut, initial_size, start_time, trace, initial_solution,
+                                                   workers = args.bnbworkers, split_depth = args.splitdepth, stats = stats, **options)
+        else:
+            best_cover = branch_and_bound(n, subsets, cut, initial_size, start_time, trace, initial_solution, stats = stats,
+                                          checkpoint = checkpoint, resume = resume, **options)
         end_time = time.time()
         runtime = round(end_time - start_time, 4)
 
-    # generate solution file
-    file_baseName = f'../output/{algo}/'+os.path.splitext(os.path.basename(filename))[0]
-    if args.seed is not None: 
+    # map the solution back to the original subsets, the forced subsets are in every cover
+    if reduction is not None:
+        best_cover = reduction.lift(best_cover)
+        trace = [(t, q + forced) for t, q in trace]
+    best_cover = [x+1 for x in best_cover] # convert to 1-indexed
+    if args.lowerbound:
+        stats["lower_bound"] = bounds["best"] + forced
+        stats["bounds"] = dict(bounds)
+        stats["gap"] = optimality_gap(cover_cost(best_cover, instance["costs"]), stats["lower_bound"])
+    return best_cover, trace, runtime, stats
+
+# relative gap between the size of a cover and a lower bound
+def optimality_gap(size, lower_bound):
+    return (size - lower_bound) / size if size else 0.0
+
+# run solve() under cProfile and save the profile to profile_filename, read it with python -m pstats <profile_filename>
+def solve_profiled(profile_filename, algo, instance, cut, seed, args, incumbent = None, **options):
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(solve, algo, instance, cut, seed, args, incumbent, **options)
+    finally:
+        profiler.dump_stats(profile_filename)
+
+# what a checkpoint must match to be resumed: the algorithm, the instance and the options that shape the search state
+def checkpoint_header(algo, filename, args):
+    header = {"algorithm": algo, "instance": checksum(filename).hex(), "reduce": args.reduce}
+    if algo == "hill":
+        header["engine"] = args.hillengine
+    elif algo == "annealing":
+        header["engine"] = args.saengine
+    elif algo == "BnB":
+        header["engine"] = (args.branching, args.bound)
+    return header
+
+# names of the solution file and of the trace file (None for Approx, which has no trace)
+def output_paths(algo, filename, cut, seed, out_dir = '../output'):
+    file_baseName = f'{out_dir}/{algo}/'+os.path.splitext(os.path.basename(filename))[0]
+    if seed is not None: 
         sol_filename = f'{file_baseName}_{algo}_{cut}_{seed}.sol'
     else:
         sol_filename = f'{file_baseName}_{algo}_{cut}.sol'
+    if algo == "Approx":
+        trace_filename = None
+    elif algo == "hill" or algo == "annealing" or (algo == "portfolio" and seed is not None): # named like the .sol
+        trace_filename = f'{file_baseName}_{algo}_{cut}_{seed}.trace'
+    else:
+        trace_filename = f'{file_baseName}_{algo}_{cut}.trace'
+    return sol_filename, trace_filename
+
+# names of the stats file and of the profile file, next to the solution file
+def extra_paths(algo, filename, cut, seed, out_dir = '../output'):
+    sol_filename, _ = output_paths(algo, filename, cut, seed, out_dir)
+    base = os.path.splitext(sol_filename)[0]
+    return base + '.stats.json', base + '.prof'
+
+# write the stats of a run as JSON: the run, its result and the counters returned by solve()
+# costs are the costs of a weighted instance, the cost of the cover is then recorded next to its size
+def write_stats(algo, filename, cut, seed, best_cover, runtime, stats, out_dir = '../output', costs = None):
+    stats_filename, _ = extra_paths(algo, filename, cut, seed, out_dir)
+    record = {"instance": os.path.splitext(os.path.basename(filename))[0], "algorithm": algo, "seed": seed,
+              "cutoff": cut, "size": len(best_cover), "runtime": runtime, "counters": stats}
+    if costs is not None:
+        record["cost"] = cover_cost(best_cover, costs)
+    with open(stats_filename, 'w') as f:
+        json.dump(record, f, indent=1)
+
+# write the solution file and, except for Approx, the trace file
+# with a lower_bound, every trace line gets the gap of its size as a third column
+# with the costs of a weighted instance, the first line of the solution file is the cost of the cover instead of its size
+def write_output(algo, filename, cut, seed, best_cover, trace, out_dir = '../output', lower_bound = None, costs = None):
+    sol_filename, trace_filename = output_paths(algo, filename, cut, seed, out_dir)
     with open(sol_filename,'w') as f:
-        f.write(str(len(best_cover))+'\n')
+        f.write(format_size(cover_cost(best_cover, costs))+'\n')
         for i in best_cover:
             f.write(str(i)+ ' ')
         
     # generate trace file
     if algo != "Approx":
         if algo == "hill" or algo == "annealing":
-            trace_filename = f'{file_baseName}_{algo}_{cut}_{seed}.trace'
             with open(trace_filename,'w') as f:
-                for i in range(len(trace_sol)):
-                    f.write(str(trace_time[i])+ ' ' + str(trace_sol[i]) + '\n')
+                for t, q in trace:
+                    gap = f" {optimality_gap(q, lower_bound):.4f}" if lower_bound is not None else ""
+                    f.write(str(t)+ ' ' + format_size(q) + gap + '\n')
 
         else:
-            trace_filename = f'{file_baseName}_{algo}_{cut}.trace'
             with open(trace_filename, 'w') as f_trace:
                 for t, q in trace:
-                    f_trace.write(f"{t:.2f} {q}\n")
+                    gap = f" {optimality_gap(q, lower_bound):.4f}" if lower_bound is not None else ""
+                    f_trace.write(f"{t:.2f} {format_size(q)}{gap}\n")
 
+# state of a portfolio worker process, set once by init_portfolio_worker()
+_portfolio = {}
 
+def init_portfolio_worker(instance, args, incumbent, start):
+    _portfolio.update(instance = instance, args = args, incumbent = incumbent, start = start)
 
-if __name__ == "__main__":
+# run one (algorithm, seed) job of the portfolio in the time left
+# return the cover and its trace with times measured from the start of the portfolio
+def run_portfolio_job(job):
+    algo, seed = job
+    instance, args, incumbent, start = _portfolio["instance"], _portfolio["args"], _portfolio["incumbent"], _portfolio["start"]
+    offset = time.time() - start
+    if offset >= args.time:
+        return None
+    best_cover, trace, _, _ = solve(algo, instance, args.time - offset, seed, args, incumbent)
+    if algo == "Approx" or algo == "BnB": # hill and annealing share their sizes while they run
+        forced = instance["reduction"].forced_cost if instance["reduction"] is not None else 0
+        offer(incumbent, cover_cost(best_cover, instance["costs"]) - forced)
+    return best_cover, [(t + offset, q) for t, q in trace]
 
-    main()
+# run every algorithm of the portfolio with every seed on a process pool under one cutoff
+# Approx and BnB do not use the seed, they run once
+# write one .sol with the best cover (the first job in order wins ties) and one merged anytime .trace
+def run_portfolio(args):
+    algos = args.portfolio.split(',')
+    first_seed = args.seed if args.seed is not None else 0
+    jobs = []
+    for algo in algos:
+        if algo == "hill" or algo == "annealing":
+            jobs += [(algo, seed) for seed in range(first_seed, first_seed + args.seeds)]
+        else:
+            jobs.append((algo, None))
+
+    try:
+        instance = load_instance(args.inst, algos, args.reduce, args.cache, report_progress if args.progress else None)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    lower_bound = None
+    if args.lowerbound: # computed once here, the workers get it with the instance
+        lower_bound = instance_bounds(instance, args.time)["best"] + (instance["reduction"].forced_cost if instance["reduction"] is not None else 0)
+    costs = instance["costs"]
+    incumbent = new_incumbent(math.inf) # any cover is smaller, sizes are stored exactly in the double
+    start = time.time()
+    with multiprocessing.Pool(args.workers, initializer = init_portfolio_worker,
+                              initargs = (instance, args, incumbent, start)) as pool:
+        results = pool.map(run_portfolio_job, jobs, chunksize = 1)
+
+    best_cover = None
+    points = []
+    for job, result in zip(jobs, results):
+        if result is None:
+            continue
+        cover, trace = result
+        if best_cover is None or cover_cost(cover, costs) < cover_cost(best_cover, costs):
+            best_cover, best_job = cover, job
+        points += trace
+    if best_cover is None:
+        print("Error: the cutoff ended before any job started", file=sys.stderr)
+        return
+
+    # anytime trace of the whole portfolio: the improvements of all jobs in time order
+    trace = []
+    for t, q in sorted(points):
+        if not trace or q < trace[-1][1]:
+            trace.append((t, q))
+    print(f"Portfolio: best cover {format_size(cover_cost(best_cover, costs))} found by {best_job[0]}" + (f" seed {best_job[1]}" if best_job[1] is not None else ""))
+    if lower_bound is not None:
+        print(f"Lower bound {format_size(lower_bound)}, gap {100 * optimality_gap(cover_cost(best_cover, costs), lower_bound):.2f}%")
+    os.makedirs('../output/portfolio', exist_ok = True)
+    write_output("portfolio", args.inst, args.time, args.seed, best_cover, trace, lower_bound = lower_bound, costs = costs)
+
+def main():
+    args = parse_args()
+    if args.portfolio:
+        run_portfolio(args)
+        return
 
+    filename = args.inst
+    algo = args.alg
+    # cut = float(args.time)
+    cut = args.time
+    seed = args.seed
+
+    try:
+        instance = load_instance(filename, [algo], args.reduce, args.cache, report_progress if args.progress else None)
+        checkpoint = resume = None
+        if args.checkpoint or args.resume:
+            header = checkpoint_header(algo, filename, args)
+            if args.resume and os.path.exists(args.resume):
+                resume = load_checkpoint(args.resume, header)
+            elif args.resume:
+                print(f"{args.resume} does not exist, starting a new search", file=sys.stderr)
+            if args.checkpoint:
+                checkpoint = Checkpoint(args.checkpoint, header, args.checkpointevery)
+        if args.profile:
+            best_cover, trace, runtime, stats = solve_profiled(extra_paths(algo, filename, cut, seed)[1], algo, instance, cut, seed, args,
+                                                               checkpoint = checkpoint, resume = resume)
+        else:
+            best_cover, trace, runtime, stats = solve(algo, instance, cut, seed, args, checkpoint = checkpoint, resume = resume)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    if algo == "BnB" and "expanded" in stats:
+        print(f"BnB nodes: {stats['expanded']} expanded, {stats['generated']} generated, {stats['pruned']} pruned "
+              f"({100 * stats['prune_rate']:.1f}%), peak frontier {stats['peak_frontier']}, "
+              f"{'optimal' if stats['complete'] else 'target reached' if stats['target_reached'] else 'cutoff reached'} in {runtime} seconds")
+        if "table_lookups" in stats:
+            print(f"BnB table: {100 * stats['table_hit_rate']:.1f}% hits ({stats['table_hits']} of {stats['table_lookups']} lookups), "
+                  f"{stats['table_entries']} entries, {stats['table_evictions']} evicted, about {stats['table_bytes'] >> 20} MB")
+
+    if args.lowerbound:
+        bounds = stats["bounds"]
+        methods = ", ".join(f"{name} {format_size(bounds[name])}" for name in ("size", "packing", "dual", "lagrangian") if name in bounds)
+        print(f"Lower bound {format_size(stats['lower_bound'])} ({methods}, in {bounds['time']:.4f} seconds), "
+              f"gap {100 * stats['gap']:.2f}%")
 
+    # generate solution and trace file
+    write_output(algo, filename, cut, seed, best_cover, trace, lower_bound = stats.get("lower_bound"), costs = instance["costs"])
+    if args.stats:
+        write_stats(algo, filename, cut, seed, best_cover, runtime, stats, costs = instance["costs"])
+
+
+
+if __name__ == "__main__":
+
+    main()
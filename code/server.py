@@ -0,0 +1,176 @@
+# This file implements the solver service: one long-running process that answers solve requests, so the
+# interpreter start, the imports and the parsing of hot instances are paid once instead of on every solve
+# the requests are JSON lines read from stdin, or from the connections of a local Unix socket, and the parsed
+# instances stay in an LRU cache bounded by their estimated memory
+#
+# python server.py [-socket <path>] [-memory <MB>] [-algorithm options of script.py]
+#
+# a request is one JSON object per line:
+# {"id": 1, "inst": "<instance file>", "alg": "hill", "time": 1.0, "seed": 1, "options": {"hillengine": "legacy"}}
+# "data": "<text of the instance>" can be given instead of "inst", "options" overrides the defaults of the server
+# (the names of the script.py options without the dash: engine, strategy, reduce, ...)
+# every request gets one JSON line per improvement, then a final line:
+# {"id": 1, "event": "improve", "time": 0.01, "size": 12}
+# {"id": 1, "event": "done", "size": 11, "cover": [1-indexed subsets], "runtime": 0.5, "stats": {...}}
+# (a weighted instance also gets "cost" in its done line, and its improvements are costs)
+# {"id": 1, "event": "error", "message": "..."}
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import socketserver
+import sys
+import tempfile
+from collections import OrderedDict
+from script import ALGORITHMS, add_solver_arguments, load_instance, solve, cover_cost
+
+# estimated bytes of a loaded instance: the set tables and their int objects, and the BnB bitmasks
+def instance_bytes(instance):
+    size = 0
+    if "s" in instance:
+        size += sum(sys.getsizeof(subset) + 28 * len(subset) for subset in instance["s"])
+        size += sys.getsizeof(instance["u"]) + 28 * len(instance["u"])
+    if "bnb" in instance:
+        size += sum(sys.getsizeof(bitmask) + 64 for bitmask, _, _ in instance["bnb"][2]) # the int and its tuple
+    return size
+
+class InstanceCache:
+    """
+    LRU cache of loaded instances (see load_instance() in script.py)
+    - limit: bytes the cached instances may take, the least recently used ones are evicted above it
+    an instance file is keyed by its path, size and modification time, so an edited file is loaded again
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.entries = OrderedDict() # key -> (instance, algos it was loaded for, estimated bytes)
+        self.used = 0
+
+    # return the instance of a request, loaded with the representations that algo needs
+    def get(self, request, algo, args):
+        if "data" in request:
+            key = ("data", hashlib.sha1(request["data"].encode()).hexdigest(), args.reduce)
+        else:
+            path = os.path.abspath(request["inst"])
+            info = os.stat(path)
+            key = (path, info.st_size, info.st_mtime_ns, args.reduce)
+
+        entry = self.entries.get(key)
+        if entry is not None and algo in entry[1]:
+            self.entries.move_to_end(key)
+            return entry[0]
+        # load again with the algorithms of the cached entry too, so it keeps both representations
+        algos = (entry[1] if entry is not None else set()) | {algo}
+        self._pop(key)
+        if "data" in request:
+            with tempfile.NamedTemporaryFile("w", suffix=".in", delete=False) as f:
+                f.write(request["data"])
+            try:
+                instance = load_instance(f.name, algos, args.reduce)
+            finally:
+                os.remove(f.name)
+        else:
+            instance = load_instance(path, algos, args.reduce, args.cache)
+
+        size = instance_bytes(instance)
+        self.entries[key] = (instance, algos, size)
+        self.used += size
+        while self.used > self.limit and len(self.entries) > 1: # the newest entry is kept even if it is too large
+            self._pop(next(iter(self.entries)))
+        return instance
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.used -= entry[2]
+
+# answer one request, every event is passed to send() as a dict
+def handle(request, cache, defaults, send):
+    request_id = request.get("id")
+    try:
+        algo = request["alg"]
+        if algo not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algo}")
+        if "inst" not in request and "data" not in request:
+            raise ValueError("A request needs an instance file (inst) or the instance text (data).")
+        args = argparse.Namespace(**vars(defaults))
+        for name, value in request.get("options", {}).items():
+            if not hasattr(defaults, name):
+                raise ValueError(f"Unknown option: {name}")
+            setattr(args, name, value)
+
+        instance = cache.get(request, algo, args)
+        seed = request.get("seed")
+        if seed is None and (algo == "hill" or algo == "annealing"):
+            seed = 0
+        on_improve = lambda t, q: send({"id": request_id, "event": "improve", "time": round(t, 4), "size": q})
+        best_cover, _, runtime, stats = solve(algo, instance, float(request["time"]), seed, args, on_improve = on_improve)
+    except (KeyError, OSError, TypeError, ValueError) as e:
+        message = f"missing field {e}" if isinstance(e, KeyError) else str(e)
+        send({"id": request_id, "event": "error", "message": message})
+        return
+    except Exception as e: # a failing solver must not end the service, the next requests are still answered
+        send({"id": request_id, "event": "error", "message": f"{type(e).__name__}: {e}"})
+        return
+    done = {"id": request_id, "event": "done", "size": len(best_cover), "cover": best_cover, "runtime": runtime, "stats": stats}
+    if instance["costs"] is not None:
+        done["cost"] = cover_cost(best_cover, instance["costs"])
+    send(done)
+
+# read JSON lines from infile and answer them on outfile until the end of the input
+def serve(infile, outfile, cache, defaults):
+    def send(event):
+        outfile.write(json.dumps(event) + "\n")
+        outfile.flush() # every improvement goes out as soon as it is found
+
+    for line in infile:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            send({"id": None, "event": "error", "message": f"invalid JSON: {e}"})
+            continue
+        if not isinstance(request, dict):
+            send({"id": None, "event": "error", "message": "a request must be a JSON object"})
+            continue
+        with contextlib.redirect_stdout(sys.stderr): # keep the algorithms' own prints out of the answers
+            handle(request, cache, defaults, send)
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-socket',help='Listen on this Unix socket instead of reading stdin')
+    parser.add_argument('-memory',type = float,default=1024,help='Memory in MB that the cached instances may take')
+    add_solver_arguments(parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    cache = InstanceCache(int(args.memory * (1 << 20)))
+    defaults = argparse.Namespace(**{name: value for name, value in vars(args).items() if name not in ("socket", "memory")})
+
+    if args.socket is None:
+        serve(sys.stdin, sys.stdout, cache, defaults)
+        return
+
+    # the connections are answered one after the other, the solvers use the global random module
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            with self.request.makefile("r") as infile, self.request.makefile("w") as outfile:
+                serve(infile, outfile, cache, defaults)
+
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    with socketserver.UnixStreamServer(args.socket, Handler) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.remove(args.socket)
+
+if __name__ == "__main__":
+
+    main()
@@ -0,0 +1,60 @@
+# This file checks that the lazy engine of approx.py (greedy_set_cover_lazy) picks the same cover as the scan engine
+# on instances of generate.py and on instances where many subsets tie on their gain, and the weighted greedy with
+# unit costs too
+# python -m pytest -q test_approx.py (or python test_approx.py without pytest)
+
+import itertools
+from approx import build_element_index, greedy_set_cover, greedy_set_cover_lazy
+from generate import KINDS, generate
+
+SEEDS = range(5)
+
+# every kind of generate.py with a few seeds and densities
+def generated_instances():
+    for kind in KINDS:
+        for seed in SEEDS:
+            for density in (0.02, 0.1):
+                universe, subsets, _ = generate(kind, 120, 80, density, seed)
+                yield f"{kind} d{density} s{seed}", universe, subsets
+
+# instances where the largest gain is shared by several subsets at (almost) every pick
+def tied_instances():
+    universe = set(range(1, 9))
+    yield "all pairs", universe, [set(pair) for pair in itertools.combinations(sorted(universe), 2)]
+    yield "all triples", universe, [set(triple) for triple in itertools.combinations(sorted(universe), 3)]
+    yield "duplicates", universe, [{1, 2, 3}, {4, 5, 6}, {1, 2, 3}, {7, 8}, {4, 5, 6}, {7, 8}]
+    yield "disjoint equal", universe, [{7, 8}, {5, 6}, {3, 4}, {1, 2}]
+    universe, subsets, _ = generate("random", 60, 40, 0.1, 7)
+    yield "generated duplicates", universe, subsets + subsets[::-1] # every gain is tied with its copy
+    # a later pick lowers the gains of earlier subsets down to ties with the ones after them
+    yield "shrinking ties", set(range(1, 7)), [{1, 2, 3, 4}, {1, 5}, {2, 6}, {5, 6}, {3, 5}, {4, 6}]
+
+def instances():
+    yield from generated_instances()
+    yield from tied_instances()
+
+def test_lazy_matches_scan_engine():
+    for name, universe, subsets in instances():
+        expected = greedy_set_cover(universe, subsets, engine="scan")
+        assert greedy_set_cover(universe, subsets, engine="lazy") == expected, name
+        assert greedy_set_cover_lazy(universe, subsets, build_element_index(subsets)) == expected, name
+
+def test_unit_costs_match_scan_engine():
+    for name, universe, subsets in instances():
+        expected = greedy_set_cover(universe, subsets, engine="scan")
+        assert greedy_set_cover(universe, subsets, costs=[1] * len(subsets)) == expected, name
+
+def test_lazy_evaluates_less_than_scan():
+    for name, universe, subsets in generated_instances():
+        scan, lazy = {}, {}
+        greedy_set_cover(universe, subsets, engine="scan", stats=scan)
+        greedy_set_cover(universe, subsets, engine="lazy", stats=lazy)
+        assert lazy["picks"] == scan["picks"], name
+        assert lazy["evaluations"] <= scan["evaluations"], name
+
+if __name__ == "__main__":
+
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name} passed")
@@ -0,0 +1,94 @@
+# This file checks that the bitset kernel (bitset.py) gives the same results as the set-based code paths
+# on instances of generate.py: the greedy covers of approx.py (scan engine), SA.py and the random restarts of hill.py,
+# the gains and the unions
+# python -m pytest -q test_bitset.py (or python test_bitset.py without pytest)
+
+import random
+from approx import build_element_index, greedy_set_cover
+from bitset import BitsetKernel, _numpy
+from generate import KINDS, generate
+import hill
+import SA
+
+if _numpy() is None:
+    import pytest
+    pytest.skip("the bitset kernel needs numpy", allow_module_level=True)
+
+SEEDS = range(5)
+
+# every kind of generate.py with a few seeds, elements spread over more than one uint64 word
+def instances():
+    for kind in KINDS:
+        for seed in SEEDS:
+            universe, subsets, _ = generate(kind, 150, 60, 0.05, seed)
+            yield kind, seed, universe, subsets
+
+# the uncovered elements of a random partial cover, and the mask of the kernel for them
+def random_uncovered(kernel, universe, subsets, rng):
+    rows = rng.sample(range(len(subsets)), rng.randint(0, len(subsets) // 4))
+    covered = set().union(*(subsets[i] for i in rows))
+    return set(universe) - covered, kernel.full & ~kernel.union(rows)
+
+def test_greedy_matches_scan_engine():
+    for kind, seed, universe, subsets in instances():
+        kernel = BitsetKernel(universe, subsets)
+        expected = [idx - 1 for idx in greedy_set_cover(universe, subsets, engine="scan")]
+        assert kernel.greedy() == expected, (kind, seed)
+
+def test_greedy_matches_annealing_initial_solution():
+    for kind, seed, universe, subsets in instances():
+        kernel = BitsetKernel(universe, subsets)
+        assert kernel.greedy() == SA.get_initial_solution(universe, subsets), (kind, seed)
+
+def test_random_initial_matches_set_backend():
+    for kind, seed, universe, subsets in instances():
+        kernel = BitsetKernel(universe, subsets)
+        for restart in range(5): # the first subset is drawn from the global random module, the same one for both
+            random.seed(restart)
+            expected = hill.get_random_initial(subsets, universe)
+            random.seed(restart)
+            assert hill.get_random_initial(subsets, universe, kernel) == expected, (kind, seed, restart)
+
+# every pair of a small universe ties on every pick, the restarts of hill.py must not all build the same cover
+def test_randomized_greedy_breaks_kernel_ties_at_random():
+    universe = set(range(1, 9))
+    subsets = [{a, b} for a in universe for b in universe if a < b]
+    kernel = BitsetKernel(universe, subsets)
+    index = build_element_index(subsets)
+    covers = set()
+    for seed in range(10):
+        cover = hill.get_randomized_greedy(subsets, universe, index, random.Random(seed), kernel, start=[0])
+        assert kernel.is_cover(cover), seed
+        covers.add(tuple(cover))
+    assert len(covers) > 1
+    assert kernel.greedy() == [idx - 1 for idx in greedy_set_cover(universe, subsets, engine="scan")] # no rng, no change
+
+def test_gains_match_set_intersections():
+    for kind, seed, universe, subsets in instances():
+        kernel = BitsetKernel(universe, subsets)
+        rng = random.Random(seed)
+        for _ in range(5):
+            uncovered, mask = random_uncovered(kernel, universe, subsets, rng)
+            assert kernel.size(mask) == len(uncovered), (kind, seed)
+            assert list(kernel.gains(mask)) == [len(subset & uncovered) for subset in subsets], (kind, seed)
+
+def test_union_and_is_cover_match_set_unions():
+    for kind, seed, universe, subsets in instances():
+        kernel = BitsetKernel(universe, subsets)
+        rng = random.Random(seed)
+        cover = [idx - 1 for idx in greedy_set_cover(universe, subsets, engine="scan")]
+        assert kernel.is_cover(cover), (kind, seed)
+        for _ in range(5):
+            rows = rng.sample(range(len(subsets)), rng.randint(0, len(subsets)))
+            union = set().union(*(subsets[i] for i in rows))
+            mask = kernel.union(rows)
+            assert kernel.size(mask) == len(union), (kind, seed)
+            assert list(kernel.gains(mask)) == [len(subset & union) for subset in subsets], (kind, seed)
+            assert kernel.is_cover(rows) == (union == set(universe)), (kind, seed)
+
+if __name__ == "__main__":
+
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name} passed")
@@ -0,0 +1,91 @@
+# This file checks the warm start of warm.py: the element index kept up to date by the deltas, and on weighted
+# instances the repaired cover, the trace and the search measuring covers by their cost
+# python -m pytest -q test_warm.py (or python test_warm.py without pytest)
+
+import random
+from approx import build_element_index, greedy_set_cover
+from generate import generate
+from warm import apply_delta, apply_delta_bnb, apply_delta_costs, repair, resolve, warm_start
+from BnB import bitmasks_from_sets
+
+# one subset covering everything that costs more than the three singletons together
+UNIVERSE = {1, 2, 3}
+SUBSETS = [{1, 2, 3}, {1}, {2}, {3}]
+COSTS = [10, 1, 1, 1]
+
+def test_warm_start_minimizes_cost():
+    for algo in ("BnB", "hill"):
+        cover, trace = warm_start(algo, UNIVERSE, SUBSETS, [0], 1, seed=1, costs=COSTS)
+        assert sorted(cover) == [1, 2, 3], algo
+        assert trace[0][1] == 10 and trace[-1][1] == 3, algo
+
+# annealing can stay in the warm cover (leaving it costs more first), but its trace holds costs
+def test_annealing_trace_holds_costs():
+    cover, trace = warm_start("annealing", UNIVERSE, SUBSETS, [0], 1, seed=1, costs=COSTS)
+    assert trace[0][1] == 10
+    assert trace[-1][1] == sum(COSTS[i] for i in cover)
+
+def test_approx_trace_holds_the_cost():
+    cover, trace = warm_start("Approx", UNIVERSE, SUBSETS, [1, 2, 3], 1, costs=COSTS)
+    assert cover == [1, 2, 3]
+    assert trace == [(0.0, 3)]
+
+def test_repair_patches_by_cost():
+    # retire the singleton of 3, the patch must take the new cheap subset instead of the expensive one
+    delta = {"remove": [3], "add": [[3]], "costs": [2]}
+    universe, subsets, removed = apply_delta(UNIVERSE, SUBSETS, delta)
+    costs = apply_delta_costs(COSTS, delta)
+    assert costs == [10, 1, 1, 1, 2]
+    assert sorted(repair(universe, subsets, [1, 2, 3], removed, costs=costs)) == [1, 2, 4]
+
+def test_repair_drops_the_expensive_redundant_subset():
+    # both covers are valid, the redundant subsets are removed from the most expensive one down
+    assert sorted(repair(UNIVERSE, SUBSETS, [0, 1, 2, 3], costs=COSTS)) == [1, 2, 3]
+
+def test_resolve_weighted():
+    delta = {"remove": [1], "add": [[1, 2]], "costs": [1]}
+    universe, subsets, bnb, costs, cover, trace = resolve("BnB", UNIVERSE, SUBSETS, [1, 2, 3], delta, 1, costs=COSTS)
+    assert costs == [10, 1, 1, 1, 1]
+    assert sorted(cover) == [3, 4] and subsets[1] == set() and subsets[4] == {1, 2}
+    assert trace[-1][1] == 2
+
+def test_weighted_delta_needs_costs():
+    try:
+        resolve("Approx", UNIVERSE, SUBSETS, [0], {"add": [[1]]}, 1, costs=COSTS)
+    except ValueError:
+        return
+    raise AssertionError("an added subset without a cost was accepted")
+
+# a few random deltas on a generated instance, the index kept by apply_delta() must be the index of the new subsets
+def test_index_follows_the_deltas():
+    universe, subsets, _ = generate("random", 60, 40, 0.3, 3)
+    index = build_element_index(subsets)
+    bnb = (len(universe), len(subsets), bitmasks_from_sets(subsets))
+    rng = random.Random(3)
+    cover = [i - 1 for i in greedy_set_cover(universe, subsets)]
+    for step in range(10):
+        n = len(universe)
+        live = [i for i, subset in enumerate(subsets) if subset]
+        # the cover loses a subset every time, so repair has something to patch
+        delta = {"remove": list({rng.choice(cover), rng.choice(live)}), "elements": [n + 1],
+                 "add": [[n + 1] + rng.sample(sorted(universe), 5)], "extend": {str(rng.choice(live)): [n + 1]}}
+        universe, subsets, removed = apply_delta(universe, subsets, delta, index)
+        bnb = apply_delta_bnb(bnb[0], bnb[2], delta)
+        expected = build_element_index(subsets)
+        assert {e: sorted(index[e]) for e in index if index[e]} == expected, step
+        assert bnb[2] == bitmasks_from_sets(subsets), step
+        if set().union(*subsets) != universe: # the delta retired the only subsets of an element
+            try:
+                repair(universe, subsets, cover, removed, step, index=index)
+            except ValueError:
+                break
+            raise AssertionError("an uncoverable instance was repaired")
+        cover = repair(universe, subsets, cover, removed, step, index=index)
+        assert set().union(*(subsets[i] for i in cover)) == universe, step
+
+if __name__ == "__main__":
+
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name} passed")
@@ -0,0 +1,172 @@
+# This file implements the warm start after small edits of an instance
+# apply_delta() edits the instance, repair() turns the previous cover into a cover of the edited instance with a
+# small greedy patch, and warm_start() runs an algorithm from the repaired cover instead of from scratch
+# resolve() does the three steps
+#
+# a delta is a dict with any of these keys:
+# - "remove": indices (0-indexed) of the retired subsets, they stay in place as empty subsets so no index changes
+# - "add": new subsets (lists of elements), appended after the existing subsets
+# - "elements": new elements of the universe, numbered after the existing ones (n+1, n+2, ...)
+# - "extend": {index: elements} elements added to existing subsets, e.g. the new elements they cover
+# - "costs": costs of the "add" subsets, needed when the instance is weighted (see apply_delta_costs())
+#
+# the element -> subsets index of the instance (build_element_index() in approx.py) is kept up to date by
+# apply_delta(), and repair() only scores the subsets it lists for the uncovered elements, so applying a delta and
+# repairing the cover cost time in the size of the delta, not of the instance
+
+import random
+import time
+from approx import build_element_index
+from hill import hill_climbing, eliminate_redundant, cost
+from SA import simulated_annealing
+from BnB import branch_and_bound, bitmasks_from_sets
+
+# edit the instance, the subsets that do not change are shared with the input instead of copied
+# index (element -> indices of the subsets containing it) is updated in place if given
+# return the new universe, the new subsets and the set of retired indices
+def apply_delta(universe, subsets, delta, index=None):
+    removed = set(delta.get("remove", ()))
+    extend = {int(i): list(elements) for i, elements in delta.get("extend", {}).items()} # JSON keys are strings
+    for i in removed | set(extend):
+        if not 0 <= i < len(subsets):
+            raise ValueError(f"Subset {i} is not in the instance.")
+    new_elements = list(delta.get("elements", ()))
+    if any(e in universe for e in new_elements):
+        raise ValueError("New elements must not be in the universe already.")
+    universe = universe | set(new_elements)
+    for elements in list(extend.values()) + list(delta.get("add", ())):
+        bad = next((e for e in elements if e not in universe), None)
+        if bad is not None:
+            raise ValueError(f"Element {bad} is not in the universe.")
+
+    new_subsets = subsets.copy() # only the edited positions are replaced
+    if index is not None:
+        for e in new_elements:
+            index[e] = []
+    for i in removed:
+        if index is not None:
+            for e in subsets[i]:
+                index[e].remove(i)
+        new_subsets[i] = set()
+    for i, elements in extend.items():
+        if i in removed:
+            continue
+        if index is not None:
+            for e in set(elements) - subsets[i]:
+                index[e].append(i)
+        new_subsets[i] = subsets[i] | set(elements)
+    for elements in delta.get("add", ()):
+        if index is not None:
+            for e in set(elements):
+                index[e].append(len(new_subsets))
+        new_subsets.append(set(elements))
+    return universe, new_subsets, removed
+
+# edit the BnB (bitmask, size, idx) tuples of an instance the same way, only the edited subsets get a new tuple
+# the tuples must be in index order (as read_input_bnb() returns them) and the new elements must be numbered
+# n+1, n+2, ... so they get the next bits
+# return n, m and the tuples, as read_input_bnb() in BnB.py
+def apply_delta_bnb(n, bnb_subsets, delta):
+    new_elements = sorted(delta.get("elements", ()))
+    if new_elements != list(range(n + 1, n + 1 + len(new_elements))):
+        raise ValueError(f"The new elements must be numbered from {n + 1} on for BnB.")
+    removed = set(delta.get("remove", ()))
+    result = bnb_subsets.copy()
+    for idx in removed:
+        result[idx] = (0, 0, idx)
+    for i, elements in delta.get("extend", {}).items():
+        idx = int(i)
+        if idx in removed:
+            continue
+        bitmask, size, _ = result[idx]
+        for e in elements:
+            if not bitmask >> (e - 1) & 1:
+                bitmask |= 1 << (e - 1)
+                size += 1
+        result[idx] = (bitmask, size, idx)
+    for elements in delta.get("add", ()):
+        bitmask = 0
+        for e in set(elements):
+            bitmask |= 1 << (e - 1)
+        result.append((bitmask, len(set(elements)), len(result)))
+    return n + len(new_elements), len(result), result
+
+# edit the costs of a weighted instance the same way: the added subsets get their costs from delta["costs"], the
+# retired ones keep theirs (they are empty, no cover uses them)
+# return the new costs, None for an unweighted instance
+def apply_delta_costs(costs, delta):
+    if costs is None:
+        return None
+    added = list(delta.get("costs", ()))
+    if len(added) != len(delta.get("add", ())):
+        raise ValueError("A weighted instance needs one cost per added subset.")
+    if any(c <= 0 for c in added):
+        raise ValueError("The costs of the subsets must be positive.")
+    return costs + added
+
+# turn a previous cover (0-indexed) into a cover of the instance
+# the retired subsets (removed) are dropped, the elements left uncovered are covered greedily by the subsets
+# touching them, and the subsets made redundant by the patch are removed
+# only the subsets that index lists for the uncovered elements are scored, so the patch costs little when the edit
+# is small (the index is built if not given). With costs, the patch takes the subset with the most uncovered
+# elements per cost
+# return the cover (0-indexed)
+def repair(universe, subsets, solution, removed=(), seed=0, costs=None, index=None):
+    solution = [i for i in dict.fromkeys(solution) if i not in removed] # drop duplicates, keep the order
+    uncovered = universe - set().union(*(subsets[i] for i in solution))
+    if uncovered:
+        if index is None:
+            index = build_element_index(subsets)
+        candidates = {i for e in uncovered for i in index.get(e, ())}
+        while uncovered:
+            if costs is None:
+                best = max(candidates, key=lambda i: (len(subsets[i] & uncovered), -i), default=None)
+            else:
+                best = max(candidates, key=lambda i: (len(subsets[i] & uncovered) / costs[i], -i), default=None)
+            if best is None or not subsets[best] & uncovered:
+                raise ValueError("Cannot cover all elements in the universe.")
+            solution.append(best)
+            uncovered -= subsets[best]
+    return eliminate_redundant(solution, subsets, random.Random(seed), costs=costs)
+
+# run an algorithm from a cover (0-indexed) of the instance
+# hill and annealing start from it, BnB uses it as its initial upper bound, Approx returns it as it is
+# bnb is (n, m, tuples) of the instance for BnB (see apply_delta_bnb()), built from the sets if not given
+# costs are the costs of the subsets of a weighted instance, the algorithms then minimize the cost of the cover
+# options are passed to the algorithm (engine, backend, strategy, ...)
+# return the cover (0-indexed) and the trace [(time, size)] (costs instead of sizes with costs)
+def warm_start(algo, universe, subsets, solution, cutoff, seed=42, bnb=None, costs=None, **options):
+    if algo == "Approx":
+        return list(solution), [(0.0, cost(solution, costs))]
+    if algo == "hill":
+        best, trace_time, trace_sol, _ = hill_climbing(universe, subsets, seed=seed, cutoff=cutoff, initial_solution=solution,
+                                                       costs=costs, **options)
+        return best, list(zip(trace_time, trace_sol))
+    if algo == "annealing":
+        best, trace_time, trace_sol, _ = simulated_annealing(universe, subsets, seed=seed, cutoff=cutoff, initial_solution=solution,
+                                                             costs=costs, **options)
+        return best, list(zip(trace_time, trace_sol))
+    if algo == "BnB":
+        if bnb is None:
+            bnb = (len(universe), len(subsets), bitmasks_from_sets(subsets))
+        n, _, bnb_subsets = bnb
+        initial_size = cost(solution, costs)
+        trace = [(0.0, initial_size)]
+        best = branch_and_bound(n, bnb_subsets, cutoff, initial_size, time.time(), trace, list(solution), costs=costs, **options)
+        return best, trace
+    raise ValueError(f"Unknown algorithm: {algo}")
+
+# apply a delta to an instance and solve it again from the previous cover
+# index is the element -> subsets index of the instance, updated in place (pass it again with the next delta)
+# return the new universe, subsets, BnB tuples (None if bnb is not given) and costs (None if costs is not given),
+# the cover (0-indexed) and the trace
+def resolve(algo, universe, subsets, solution, delta, cutoff, seed=42, bnb=None, costs=None, index=None, **options):
+    if index is None:
+        index = build_element_index(subsets)
+    universe, subsets, removed = apply_delta(universe, subsets, delta, index)
+    if bnb is not None:
+        bnb = apply_delta_bnb(bnb[0], bnb[2], delta)
+    costs = apply_delta_costs(costs, delta)
+    solution = repair(universe, subsets, solution, removed, seed, costs, index)
+    cover, trace = warm_start(algo, universe, subsets, solution, cutoff, seed, bnb, costs, **options)
+    return universe, subsets, bnb, costs, cover, trace